@@ -1,12 +1,14 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure, BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
 from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
@@ -17,8 +19,25 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import aiohttp
 import PyPDF2
-import io
+from PyPDF2.generic import (
+    ArrayObject, ByteStringObject, DecodedStreamObject, DictionaryObject, FloatObject,
+    IndirectObject, NameObject, NumberObject, RectangleObject
+)
 import json
+import base64
+import io
+import csv
+import zlib
+from urllib.parse import quote
+import argparse
+import asyncio
+import shutil
+import time
+import math
+import multiprocessing
+import re
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 
 ROOT_DIR = Path(__file__).parent
@@ -26,16 +45,202 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # Storage directories
+# PDFs written before blobs/ (storage/contracts/, storage/signed/) keep their
+# absolute file_path and are only read until migrate-storage copies them
 STORAGE_DIR = ROOT_DIR / 'storage'
-CONTRACTS_DIR = STORAGE_DIR / 'contracts'
-SIGNED_DIR = STORAGE_DIR / 'signed'
+BLOBS_DIR = STORAGE_DIR / 'blobs'
+BLOBS_TMP_DIR = BLOBS_DIR / 'tmp'
+
+BLOBS_TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+# Storage backend for contract and signed PDFs ('local' or 's3')
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+S3_PREFIX = os.environ.get('S3_PREFIX', '')
+S3_CACHE_DIR = Path(os.environ.get('S3_CACHE_DIR', STORAGE_DIR / 'cache'))
+S3_CACHE_MAX_BYTES = int(os.environ.get('S3_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+S3_MULTIPART_THRESHOLD = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE = int(os.environ.get('S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.environ.get('S3_MULTIPART_CONCURRENCY', 4))
+# Redirect downloads to presigned URLs instead of proxying them (s3 only)
+STORAGE_PRESIGNED_DOWNLOADS = os.environ.get('STORAGE_PRESIGNED_DOWNLOADS', 'false').lower() in ('1', 'true', 'yes')
+STORAGE_PRESIGNED_EXPIRY = int(os.environ.get('STORAGE_PRESIGNED_EXPIRY', 300))
+
+# Unreferenced blobs younger than this are kept (protects in-flight uploads)
+BLOB_GC_GRACE_SECONDS = int(os.environ.get('BLOB_GC_GRACE_SECONDS', 3600))
+
+# Upload limits
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+
+# Batch integrity verification
+VERIFY_BATCH_MAX_HASHES = int(os.environ.get('VERIFY_BATCH_MAX_HASHES', 10000))
+VERIFY_BATCH_MAX_FILES = int(os.environ.get('VERIFY_BATCH_MAX_FILES', 200))
+# Uploads are only hashed, never stored, so they may exceed MAX_UPLOAD_SIZE
+VERIFY_MAX_UPLOAD_SIZE = int(os.environ.get('VERIFY_MAX_UPLOAD_SIZE', 512 * 1024 * 1024))
+
+# Bulk operations
+BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', 5000))
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 500))
+FRONTEND_URL = os.environ.get('FRONTEND_URL', '')
+
+# Dashboard statistics cache
+DASHBOARD_STATS_TTL = float(os.environ.get('DASHBOARD_STATS_TTL', 10))
+DASHBOARD_STATS_DAYS = int(os.environ.get('DASHBOARD_STATS_DAYS', 30))
+DASHBOARD_STATS_TOP_CONTRACTS = int(os.environ.get('DASHBOARD_STATS_TOP_CONTRACTS', 20))
+
+# Contract metadata cache
+CONTRACT_CACHE_SIZE = int(os.environ.get('CONTRACT_CACHE_SIZE', 1024))
+CONTRACT_CACHE_TTL = float(os.environ.get('CONTRACT_CACHE_TTL', 300))
+
+# Dashboard counters reconciliation interval (0 disables the background job)
+STATS_RECONCILE_SECONDS = float(os.environ.get('STATS_RECONCILE_SECONDS', 3600))
+
+# Downloads: content never changes for a given hash, so it can be cached for a year
+DOWNLOAD_CACHE_CONTROL = os.environ.get('DOWNLOAD_CACHE_CONTROL', 'private, max-age=31536000, immutable')
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 256 * 1024))
+
+# Audit hash chain and Merkle checkpoints (AUDIT_CHECKPOINT_BLOCK must be a power of two)
+AUDIT_CHAIN_RETRIES = int(os.environ.get('AUDIT_CHAIN_RETRIES', 5))
+AUDIT_CHECKPOINT_SECONDS = int(os.environ.get('AUDIT_CHECKPOINT_SECONDS', 300))
+AUDIT_CHECKPOINT_MAX_LEAVES = int(os.environ.get('AUDIT_CHECKPOINT_MAX_LEAVES', 1000000))
+AUDIT_CHECKPOINT_BLOCK = int(os.environ.get('AUDIT_CHECKPOINT_BLOCK', 1024))
+# Block roots only line up with the RFC 6962 split points for powers of two
+if AUDIT_CHECKPOINT_BLOCK < 1 or AUDIT_CHECKPOINT_BLOCK & (AUDIT_CHECKPOINT_BLOCK - 1):
+    raise ValueError(f"AUDIT_CHECKPOINT_BLOCK debe ser una potencia de 2 (recibido {AUDIT_CHECKPOINT_BLOCK})")
+AUDIT_CHECKPOINT_STALE_SECONDS = int(os.environ.get('AUDIT_CHECKPOINT_STALE_SECONDS', 900))
+
+# OTP rate limiting: token buckets (burst, refills per minute) per request and per
+# client IP, plus a lockout after repeated failed verifications
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+OTP_SEND_BURST = int(os.environ.get('OTP_SEND_BURST', 3))
+OTP_SEND_PER_MINUTE = float(os.environ.get('OTP_SEND_PER_MINUTE', 1))
+OTP_SEND_IP_BURST = int(os.environ.get('OTP_SEND_IP_BURST', 20))
+OTP_SEND_IP_PER_MINUTE = float(os.environ.get('OTP_SEND_IP_PER_MINUTE', 10))
+OTP_VERIFY_BURST = int(os.environ.get('OTP_VERIFY_BURST', 5))
+OTP_VERIFY_PER_MINUTE = float(os.environ.get('OTP_VERIFY_PER_MINUTE', 5))
+OTP_VERIFY_IP_BURST = int(os.environ.get('OTP_VERIFY_IP_BURST', 30))
+OTP_VERIFY_IP_PER_MINUTE = float(os.environ.get('OTP_VERIFY_IP_PER_MINUTE', 30))
+OTP_MAX_FAILED_ATTEMPTS = int(os.environ.get('OTP_MAX_FAILED_ATTEMPTS', 5))
+OTP_LOCKOUT_SECONDS = int(os.environ.get('OTP_LOCKOUT_SECONDS', 900))
+# Reverse proxies in front of the API that append to X-Forwarded-For; the client
+# IP is the entry added by the outermost one (0 = use the socket address)
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+# A signing attempt older than this is considered abandoned and may be retried
+SIGN_CLAIM_TIMEOUT_SECONDS = int(os.environ.get('SIGN_CLAIM_TIMEOUT_SECONDS', 300))
 
-CONTRACTS_DIR.mkdir(parents=True, exist_ok=True)
-SIGNED_DIR.mkdir(parents=True, exist_ok=True)
+# Streaming exports (documents fetched per cursor batch, bytes per response chunk)
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_MAX_BATCH_SIZE = int(os.environ.get('EXPORT_MAX_BATCH_SIZE', 10000))
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 64 * 1024))
+
+# Pagination limits for list endpoints
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+
+# Worker pools for blocking work (file I/O in threads, PDF parsing in processes)
+IO_POOL_WORKERS = int(os.environ.get('IO_POOL_WORKERS', 8))
+IO_POOL_QUEUE = int(os.environ.get('IO_POOL_QUEUE', 64))
+PDF_POOL_WORKERS = int(os.environ.get('PDF_POOL_WORKERS', os.cpu_count() or 2))
+PDF_POOL_QUEUE = int(os.environ.get('PDF_POOL_QUEUE', 16))
+PDF_POOL_MODE = os.environ.get('PDF_POOL_MODE', 'process')
+
+# SMTP connection pool
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 4))
+SMTP_IDLE_TIMEOUT = float(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+SMTP_HEALTH_CHECK_SECONDS = float(os.environ.get('SMTP_HEALTH_CHECK_SECONDS', 15))
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 30))
+
+# Buffered audit log writer
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', 1))
+AUDIT_DURABLE_ACTIONS = set(filter(None, os.environ.get(
+    'AUDIT_DURABLE_ACTIONS', 'contract_signed,otp_verified'
+).split(',')))
+
+# Shared HTTP client and SMS provider
+HTTP_POOL_LIMIT = int(os.environ.get('HTTP_POOL_LIMIT', 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get('HTTP_POOL_LIMIT_PER_HOST', 20))
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 15))
+SMS_PROVIDER = os.environ.get('SMS_PROVIDER', 'textmebot')
+
+# Outbound notification queue
+NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', 2))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5))
+NOTIFICATION_RETRY_BASE_SECONDS = float(os.environ.get('NOTIFICATION_RETRY_BASE_SECONDS', 5))
+NOTIFICATION_RETRY_MAX_SECONDS = float(os.environ.get('NOTIFICATION_RETRY_MAX_SECONDS', 900))
+NOTIFICATION_POLL_SECONDS = float(os.environ.get('NOTIFICATION_POLL_SECONDS', 2))
+NOTIFICATION_LOCK_SECONDS = int(os.environ.get('NOTIFICATION_LOCK_SECONDS', 120))
+# Due emails a worker claims at once and sends over one SMTP session
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.environ.get('NOTIFICATION_EMAIL_BATCH_SIZE', 20))
+# Sent and dead notifications are deleted after this (their body is dropped at once)
+NOTIFICATION_RETENTION_SECONDS = int(os.environ.get('NOTIFICATION_RETENTION_SECONDS', 7 * 24 * 3600))
+
+# Indexes backing every lookup the API performs, keyed by collection
+INDEX_SPECS = {
+    "contracts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("file_hash", ASCENDING)], name="file_hash"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "signature_requests": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("token", ASCENDING)], name="token_unique", unique=True),
+        IndexModel([("signed_file_hash", ASCENDING)], name="signed_file_hash"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("contract_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="contract_id_created_at_id"),
+        IndexModel([("signer_email", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="signer_email_created_at_id"),
+    ],
+    "otps": [
+        IndexModel([("request_id", ASCENDING), ("otp", ASCENDING), ("used", ASCENDING)], name="request_id_otp_used"),
+        IndexModel([("expiry", ASCENDING)], name="expiry_ttl", expireAfterSeconds=0),
+    ],
+    "rate_limits": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("request_id", ASCENDING)], name="request_id"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "pdf_schemas": [
+        IndexModel([("file_hash", ASCENDING)], name="file_hash_unique", unique=True),
+    ],
+    "blobs": [
+        IndexModel([("hash", ASCENDING)], name="hash_unique", unique=True),
+    ],
+    "document_hashes": [
+        IndexModel([("hash", ASCENDING)], name="hash"),
+        IndexModel([("kind", ASCENDING), ("ref_id", ASCENDING)], name="kind_ref_id_unique", unique=True),
+    ],
+    "audit_logs": [
+        IndexModel([("request_id", ASCENDING), ("timestamp", DESCENDING)], name="request_id_timestamp"),
+        IndexModel([("timestamp", DESCENDING)], name="timestamp"),
+        IndexModel([("id", ASCENDING)], name="id"),
+        IndexModel(
+            [("request_id", ASCENDING), ("seq", ASCENDING)],
+            name="request_id_seq_unique",
+            unique=True,
+            partialFilterExpression={"seq": {"$exists": True}}
+        ),
+        IndexModel([("checkpoint", ASCENDING), ("entry_hash", ASCENDING)], name="checkpoint_entry_hash"),
+    ],
+    "stats_counters": [
+        IndexModel([("kind", ASCENDING), ("total", DESCENDING)], name="kind_total"),
+        IndexModel([("kind", ASCENDING), ("key", ASCENDING)], name="kind_key"),
+    ],
+    "audit_checkpoints": [
+        IndexModel([("seq", ASCENDING)], name="seq_unique", unique=True),
+    ],
+}
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -44,6 +249,831 @@ app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 
+# Executors
+class BoundedExecutor:
+    """Run blocking callables in a worker pool with a bounded backlog.
+
+    When every worker is busy and the backlog is full, new tasks are
+    rejected with a 503 so callers back off instead of piling up.
+    """
+    
+    def __init__(self, name: str, pool_factory, max_workers: int, max_queue: int):
+        self.name = name
+        self.pool_factory = pool_factory
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pool = None
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+    
+    async def run(self, fn, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, intente nuevamente",
+                headers={"Retry-After": "1"}
+            )
+        if self.pool is None:
+            self.pool = self.pool_factory(max_workers=self.max_workers)
+        
+        self.pending += 1
+        self.submitted += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+            latency = time.perf_counter() - started
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+    
+    def metrics(self) -> Dict:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self.pending, self.max_workers),
+            "queue_depth": max(0, self.pending - self.max_workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.total_latency / finished * 1000, 2) if finished else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2)
+        }
+    
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+class SMTPConnectionPool:
+    """Keep authenticated SMTP sessions open and reuse them across messages.
+
+    Idle sessions older than idle_timeout are closed; sessions idle longer
+    than health_check_seconds are probed with NOOP before reuse. A send that
+    fails on a reused session is retried once on a fresh connection.
+    """
+    
+    def __init__(self, size: int, idle_timeout: float, health_check_seconds: float, timeout: float):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check_seconds = health_check_seconds
+        self.timeout = timeout
+        self.idle = deque()
+        self.semaphore = None
+        self.handshakes = 0
+        self.messages_sent = 0
+        self.messages_failed = 0
+        self.reconnects = 0
+        self.sent_times = deque(maxlen=10000)
+    
+    def settings(self) -> Dict:
+        smtp_pass = os.environ.get('SMTP_PASS', '')
+        smtp_user = os.environ.get('SMTP_USER', 'sistema.contratos@academiajotuns.com')
+        return {
+            "hostname": os.environ.get('SMTP_HOST', 'mail.academiajotuns.com'),
+            "port": int(os.environ.get('SMTP_PORT', 465)),
+            "use_tls": os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true',
+            "username": smtp_user if smtp_pass else None,
+            "password": smtp_pass or None
+        }
+    
+    async def connect(self) -> aiosmtplib.SMTP:
+        settings = self.settings()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings['hostname'],
+            port=settings['port'],
+            use_tls=settings['use_tls'],
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        if settings['username']:
+            try:
+                await smtp.login(settings['username'], settings['password'])
+            except BaseException:
+                await self.close(smtp)
+                raise
+        self.handshakes += 1
+        return smtp
+    
+    async def close(self, smtp: aiosmtplib.SMTP):
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except Exception:
+            smtp.close()
+    
+    async def acquire(self) -> aiosmtplib.SMTP:
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.size)
+        await self.semaphore.acquire()
+        try:
+            while self.idle:
+                smtp, last_used = self.idle.pop()
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout or not smtp.is_connected:
+                    await self.close(smtp)
+                    continue
+                if idle_for > self.health_check_seconds:
+                    try:
+                        await smtp.noop()
+                    except Exception:
+                        await self.close(smtp)
+                        continue
+                return smtp
+            return await self.connect()
+        except BaseException:
+            self.semaphore.release()
+            raise
+    
+    def release(self, smtp: aiosmtplib.SMTP):
+        if smtp.is_connected:
+            self.idle.append((smtp, time.monotonic()))
+        self.semaphore.release()
+    
+    async def send_with(self, smtp: aiosmtplib.SMTP, message) -> aiosmtplib.SMTP:
+        """Send on smtp, reconnecting once if the session turns out to be dead"""
+        try:
+            await smtp.send_message(message)
+        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+            self.reconnects += 1
+            await self.close(smtp)
+            smtp = await self.connect()
+            await smtp.send_message(message)
+        self.messages_sent += 1
+        self.sent_times.append(time.monotonic())
+        return smtp
+    
+    async def send(self, message) -> bool:
+        return (await self.send_batch([message]))[0]
+    
+    async def send_batch(self, messages: List) -> List[bool]:
+        """Send many messages over a single SMTP session"""
+        results = []
+        smtp = await self.acquire()
+        try:
+            for message in messages:
+                try:
+                    smtp = await self.send_with(smtp, message)
+                    results.append(True)
+                except Exception as e:
+                    self.messages_failed += 1
+                    logger.error(f"Error sending email: {str(e)}")
+                    results.append(False)
+        finally:
+            self.release(smtp)
+        return results
+    
+    async def close_all(self):
+        while self.idle:
+            smtp, _ = self.idle.pop()
+            await self.close(smtp)
+    
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        recent = sum(1 for t in self.sent_times if now - t <= 60)
+        return {
+            "pool_size": self.size,
+            "idle_connections": len(self.idle),
+            "handshakes": self.handshakes,
+            "reconnects": self.reconnects,
+            "messages_sent": self.messages_sent,
+            "messages_failed": self.messages_failed,
+            "messages_per_second": round(recent / 60, 3)
+        }
+
+class HTTPClient:
+    """Application-wide aiohttp session with a bounded, keep-alive connection pool"""
+    
+    def __init__(self, limit: int, limit_per_host: int, timeout: float):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class SMSProvider:
+    """Base class for SMS gateways. Subclasses implement send()."""
+    
+    async def send(self, session: aiohttp.ClientSession, phone: str, message: str) -> bool:
+        raise NotImplementedError
+
+
+class TextMeBotProvider(SMSProvider):
+    """TextMeBot HTTP API (GET with query parameters)"""
+    
+    async def send(self, session: aiohttp.ClientSession, phone: str, message: str) -> bool:
+        params = {
+            "recipient": phone,
+            "apikey": os.environ.get('TEXTMEBOT_API_KEY', ''),
+            "text": message
+        }
+        api_url = os.environ.get('TEXTMEBOT_API_URL', 'https://api.textmebot.com/send.php')
+        async with session.get(api_url, params=params) as response:
+            await response.read()
+            return response.status == 200
+
+
+class WebhookSMSProvider(SMSProvider):
+    """Generic gateway receiving a JSON POST {to, message} at SMS_WEBHOOK_URL"""
+    
+    async def send(self, session: aiohttp.ClientSession, phone: str, message: str) -> bool:
+        headers = {}
+        if os.environ.get('SMS_WEBHOOK_TOKEN'):
+            headers["Authorization"] = f"Bearer {os.environ['SMS_WEBHOOK_TOKEN']}"
+        async with session.post(
+            os.environ['SMS_WEBHOOK_URL'],
+            json={"to": phone, "message": message},
+            headers=headers
+        ) as response:
+            await response.read()
+            return 200 <= response.status < 300
+
+
+SMS_PROVIDERS = {
+    "textmebot": TextMeBotProvider,
+    "webhook": WebhookSMSProvider,
+}
+
+class AuditWriter:
+    """Buffer audit documents in memory and write them with insert_many.
+
+    The buffer is flushed when it reaches batch_size, every flush_seconds
+    from a background task, on shutdown, and immediately for durable writes.
+    """
+    
+    def __init__(self, batch_size: int, flush_seconds: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.lock = None
+        self.task = None
+        self.events_written = 0
+        self.batches_written = 0
+        self.flush_errors = 0
+        self.chain_conflicts = 0
+    
+    async def write(self, doc: Dict, durable: bool = False):
+        self.buffer.append(doc)
+        if durable or len(self.buffer) >= self.batch_size:
+            await self.flush(raise_errors=durable)
+    
+    async def flush(self, raise_errors: bool = False):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if not self.buffer:
+                return
+            # Group by request (stable, so each chain keeps its order)
+            batch = sorted(self.buffer, key=lambda doc: doc['request_id'])
+            self.buffer = []
+            for attempt in range(AUDIT_CHAIN_RETRIES):
+                try:
+                    await db.audit_logs.insert_many(await chain_audit_entries(batch), ordered=True)
+                except Exception as e:
+                    written = e.details.get('nInserted', 0) if isinstance(e, BulkWriteError) else 0
+                    self.events_written += written
+                    batch = batch[written:]
+                    # Another writer extended one of the chains first: relink and retry
+                    conflict = isinstance(e, BulkWriteError) and all(
+                        error.get('code') == 11000 for error in e.details.get('writeErrors', [])
+                    )
+                    if conflict and attempt + 1 < AUDIT_CHAIN_RETRIES:
+                        self.chain_conflicts += 1
+                        continue
+                    self.flush_errors += 1
+                    # Keep whatever was not written so the next flush retries it
+                    self.buffer = batch + self.buffer
+                    logger.error(f"Error writing audit logs: {str(e)}")
+                    if raise_errors:
+                        raise
+                    return
+                self.events_written += len(batch)
+                self.batches_written += 1
+                return
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+    
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+    
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+    
+    def metrics(self) -> Dict:
+        return {
+            "buffered": len(self.buffer),
+            "events_written": self.events_written,
+            "batches_written": self.batches_written,
+            "avg_batch_size": round(self.events_written / self.batches_written, 2) if self.batches_written else 0.0,
+            "flush_errors": self.flush_errors,
+            "chain_conflicts": self.chain_conflicts
+        }
+
+class CachedValue:
+    """A single value cached in-process for ttl seconds.
+
+    Concurrent misses share one computation; invalidate() forces the next
+    get() to recompute.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.value = None
+        self.expires_at = 0.0
+        self.version = 0
+        self.lock = None
+    
+    async def get(self, compute):
+        if time.monotonic() < self.expires_at:
+            return self.value
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if time.monotonic() < self.expires_at:
+                return self.value
+            version = self.version
+            value = await compute()
+            # Only cache if nothing invalidated the value while computing it
+            if version == self.version:
+                self.value = value
+                self.expires_at = time.monotonic() + self.ttl
+            return value
+    
+    def invalidate(self):
+        self.version += 1
+        self.expires_at = 0.0
+
+class LRUCache:
+    """Bounded in-process cache with least-recently-used eviction and a TTL"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key, value):
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def metrics(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class RateLimiter:
+    """Token buckets keyed by string. acquire() takes one token and returns 0
+    when allowed, or the seconds until a token becomes available.
+    """
+    
+    def __init__(self):
+        self.allowed = 0
+        self.limited = 0
+    
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        raise NotImplementedError
+    
+    async def acquire(self, key: str, capacity: int, per_second: float) -> float:
+        wait = await self.take(key, capacity, per_second)
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+    
+    def metrics(self) -> Dict:
+        return {"backend": self.name, "allowed": self.allowed, "limited": self.limited}
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Per-process buckets; enough for a single API replica"""
+    
+    name = "memory"
+    
+    def __init__(self, max_keys: int):
+        super().__init__()
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+    
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / per_second
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class MongoRateLimiter(RateLimiter):
+    """Buckets in the rate_limits collection, shared by every API replica.
+
+    Refill and take happen in one pipeline update, so concurrent requests on
+    different replicas cannot spend the same token. Idle buckets are removed
+    by a TTL index once they would be full again.
+    """
+    
+    name = "mongo"
+    
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        now = time.time()
+        elapsed = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, per_second]}]}]}
+        doc = await db.rate_limits.find_one_and_update(
+            {"key": key},
+            [
+                {"$set": {"tokens": refilled, "updated": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=capacity / per_second)
+                }}
+            ],
+            projection={"_id": 0, "tokens": 1, "allowed": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc['allowed']:
+            return 0.0
+        return (1 - doc['tokens']) / per_second
+
+
+RATE_LIMITERS = {
+    "memory": lambda: MemoryRateLimiter(RATE_LIMIT_MAX_KEYS),
+    "mongo": MongoRateLimiter,
+}
+
+class StorageBackend:
+    """Object store for contract and signed PDFs, addressed by key ('blobs/ab/cd/<sha256>').
+
+    All methods are blocking and must run in io_executor.
+    """
+    
+    name = "base"
+    
+    def location(self, key: str) -> str:
+        """Value stored in file_path fields for a key"""
+        raise NotImplementedError
+    
+    def put_file(self, key: str, source: Path, move: bool):
+        """Store source under key unless the key already exists"""
+        raise NotImplementedError
+    
+    def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+    
+    def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, or None if the key does not exist"""
+        raise NotImplementedError
+    
+    def iter_range(self, key: str, first: int, last: int, chunk_size: int):
+        """Yield the bytes first..last (inclusive) of an object"""
+        raise NotImplementedError
+    
+    def fetch(self, key: str) -> Path:
+        """Local path with the object contents, for code that needs a real file"""
+        raise NotImplementedError
+    
+    def delete(self, key: str):
+        raise NotImplementedError
+    
+    def list_keys(self, prefix: str, older_than: float) -> List[str]:
+        """Keys under prefix last modified before the given epoch timestamp"""
+        raise NotImplementedError
+    
+    def presigned_url(self, key: str, filename: str, expires: int) -> Optional[str]:
+        """Time-limited direct download URL, or None if the backend has none"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory (single replica or a shared volume)"""
+    
+    name = "local"
+    
+    def __init__(self, root: Path, tmp_dir: Path):
+        self.root = root
+        self.tmp_dir = tmp_dir
+    
+    def path(self, key: str) -> Path:
+        return self.root / key
+    
+    def location(self, key: str) -> str:
+        return str(self.path(key))
+    
+    def put_file(self, key: str, source: Path, move: bool):
+        """With move=True the source is renamed into place (or deleted if the key
+        exists); otherwise it is hardlinked, falling back to a copy across devices.
+        """
+        target = self.path(key)
+        if target.exists():
+            if move:
+                source.unlink(missing_ok=True)
+            return
+        
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(source, target)
+            return
+        
+        tmp_target = self.tmp_dir / f"{uuid.uuid4()}.part"
+        try:
+            os.link(source, tmp_target)
+        except OSError:
+            shutil.copyfile(source, tmp_target)
+        os.replace(tmp_target, target)
+    
+    def put_bytes(self, key: str, data: bytes):
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_target = self.tmp_dir / f"{uuid.uuid4()}.part"
+        tmp_target.write_bytes(data)
+        os.replace(tmp_target, target)
+    
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+    
+    def iter_range(self, key: str, first: int, last: int, chunk_size: int):
+        with open(self.path(key), "rb") as f:
+            f.seek(first)
+            remaining = last - first + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    
+    def fetch(self, key: str) -> Path:
+        return self.path(key)
+    
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+    
+    def list_keys(self, prefix: str, older_than: float) -> List[str]:
+        keys = []
+        base = self.path(prefix)
+        if not base.exists():
+            return keys
+        for path in base.rglob("*"):
+            if path.is_file() and path.parent != self.tmp_dir and path.stat().st_mtime < older_than:
+                keys.append(path.relative_to(self.root).as_posix())
+        return keys
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible bucket (AWS S3, MinIO, ...) shared by every API replica.
+
+    Uploads above S3_MULTIPART_THRESHOLD use multipart transfers; objects
+    needed as local files (PDF parsing and signing) are cached under
+    S3_CACHE_DIR, which is safe because blobs never change once written;
+    the least recently used copies are evicted above S3_CACHE_MAX_BYTES.
+    """
+    
+    name = "s3"
+    
+    def __init__(self):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+        
+        self.bucket = os.environ['S3_BUCKET']
+        self.prefix = S3_PREFIX
+        self.cache_dir = S3_CACHE_DIR
+        self.cache_max_bytes = S3_CACHE_MAX_BYTES
+        self.client_error = ClientError
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None,
+            region_name=os.environ.get('S3_REGION') or None,
+            config=Config(
+                max_pool_connections=IO_POOL_WORKERS,
+                s3={"addressing_style": os.environ.get('S3_ADDRESSING_STYLE', 'auto')}
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=S3_MULTIPART_CONCURRENCY
+        )
+    
+    def object_key(self, key: str) -> str:
+        return self.prefix + key
+    
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+    
+    def put_file(self, key: str, source: Path, move: bool):
+        if self.size(key) is None:
+            self.client.upload_file(
+                str(source), self.bucket, self.object_key(key),
+                ExtraArgs={"ContentType": "application/pdf"},
+                Config=self.transfer_config
+            )
+        if move:
+            source.unlink(missing_ok=True)
+    
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+    
+    def size(self, key: str) -> Optional[int]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except self.client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"]
+    
+    def iter_range(self, key: str, first: int, last: int, chunk_size: int):
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self.object_key(key), Range=f"bytes={first}-{last}"
+        )
+        # Closing returns the connection to the pool when the client aborts early
+        try:
+            yield from response["Body"].iter_chunks(chunk_size)
+        finally:
+            response["Body"].close()
+    
+    def fetch(self, key: str) -> Path:
+        cached = self.cache_dir / key
+        if cached.exists():
+            os.utime(cached)
+            return cached
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp_target = self.cache_dir / f"{uuid.uuid4()}.part"
+        try:
+            self.client.download_file(
+                self.bucket, self.object_key(key), str(tmp_target), Config=self.transfer_config
+            )
+            os.replace(tmp_target, cached)
+        finally:
+            tmp_target.unlink(missing_ok=True)
+        self.evict_cache(keep=cached)
+        return cached
+    
+    def evict_cache(self, keep: Path):
+        """Delete the least recently used cached copies above cache_max_bytes"""
+        entries = []
+        for path in self.cache_dir.rglob("*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file() and path.suffix != ".part":
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            if path != keep:
+                path.unlink(missing_ok=True)
+                total -= size
+    
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+        (self.cache_dir / key).unlink(missing_ok=True)
+    
+    def list_keys(self, prefix: str, older_than: float) -> List[str]:
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix)):
+            for item in page.get("Contents", []):
+                if item["LastModified"].timestamp() < older_than:
+                    keys.append(item["Key"][len(self.prefix):])
+        return keys
+    
+    def presigned_url(self, key: str, filename: str, expires: int) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(key),
+                "ResponseContentType": "application/pdf",
+                "ResponseContentDisposition": content_disposition(filename)
+            },
+            ExpiresIn=expires
+        )
+
+
+def create_storage_backend(name: str) -> StorageBackend:
+    if name == "local":
+        return LocalStorage(STORAGE_DIR, BLOBS_TMP_DIR)
+    if name == "s3":
+        return S3Storage()
+    raise ValueError(f"Backend de almacenamiento desconocido: {name}")
+
+def pdf_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers start from a fresh interpreter.
+
+    The pool is created lazily, once Motor, the I/O threads and the background
+    tasks are running; forking then could copy a lock held by another thread
+    and deadlock the child. Workers import this module and run its top-level
+    functions (extract_pdf_fields, sign_pdf).
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+io_executor = BoundedExecutor("io", ThreadPoolExecutor, IO_POOL_WORKERS, IO_POOL_QUEUE)
+pdf_executor = BoundedExecutor(
+    "pdf",
+    pdf_process_pool if PDF_POOL_MODE == 'process' else ThreadPoolExecutor,
+    PDF_POOL_WORKERS,
+    PDF_POOL_QUEUE
+)
+smtp_pool = SMTPConnectionPool(SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT, SMTP_HEALTH_CHECK_SECONDS, SMTP_TIMEOUT)
+dashboard_stats_cache = CachedValue(DASHBOARD_STATS_TTL)
+contract_cache = LRUCache(CONTRACT_CACHE_SIZE, CONTRACT_CACHE_TTL)
+audit_writer = AuditWriter(AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS)
+http_client = HTTPClient(HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_TIMEOUT)
+sms_provider = SMS_PROVIDERS[SMS_PROVIDER]()
+storage = create_storage_backend(STORAGE_BACKEND)
+rate_limiter = RATE_LIMITERS[RATE_LIMIT_BACKEND]()
+
+
 # Pydantic Models
 class AdminLoginRequest(BaseModel):
     username: str
@@ -61,6 +1091,7 @@ class Contract(BaseModel):
     name: str
     description: Optional[str] = None
     file_path: str
+    file_name: Optional[str] = None
     file_hash: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     fields: List[Dict] = []
@@ -77,7 +1108,7 @@ class SignatureRequest(BaseModel):
     signer_name: str
     signer_email: EmailStr
     signer_phone: Optional[str] = None
-    status: str = "pending"  # pending, otp_sent, signed, rejected
+    status: str = "pending"  # pending, otp_sent, otp_verified, signed, rejected, expired
     token: str = Field(default_factory=lambda: secrets.token_urlsafe(32))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     signed_at: Optional[datetime] = None
@@ -92,6 +1123,32 @@ class SignatureRequestCreate(BaseModel):
     send_via_email: bool = True
     send_via_sms: bool = False
 
+class BulkSigner(BaseModel):
+    signer_name: str = Field(min_length=1)
+    signer_email: EmailStr
+    signer_phone: Optional[str] = None
+
+class BulkSignatureRequestCreate(BaseModel):
+    contract_id: str
+    signers: List[Dict]
+    send_invitations: bool = False
+    send_via_email: bool = True
+    send_via_sms: bool = False
+
+class BulkRowResult(BaseModel):
+    row: int
+    success: bool
+    request_id: Optional[str] = None
+    signer_email: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkSignatureRequestResponse(BaseModel):
+    contract_id: str
+    created: int
+    failed: int
+    invitations_queued: int
+    results: List[BulkRowResult]
+
 class OTPSendRequest(BaseModel):
     request_id: str
 
@@ -99,104 +1156,2028 @@ class OTPVerifyRequest(BaseModel):
     request_id: str
     otp: str
 
-class OTPVerifyResponse(BaseModel):
-    success: bool
-    message: str
+class OTPVerifyResponse(BaseModel):
+    success: bool
+    message: str
+
+class SignContractRequest(BaseModel):
+    request_id: str
+    form_data: Dict
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    idempotency_key: Optional[str] = None
+
+class AuditLog(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    request_id: str
+    action: str
+    details: Dict
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    seq: Optional[int] = None
+    prev_hash: Optional[str] = None
+    entry_hash: Optional[str] = None
+    checkpoint: Optional[int] = None
+
+class VerifyIntegrityRequest(BaseModel):
+    file_hash: str
+
+class VerifyIntegrityResponse(BaseModel):
+    valid: bool
+    message: str
+    found_in_system: bool
+
+class VerifyIntegrityBatchRequest(BaseModel):
+    file_hashes: List[str]
+
+class DocumentHashMatch(BaseModel):
+    kind: str  # contract, signed
+    contract_id: str
+    request_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class VerifyIntegrityBatchItem(BaseModel):
+    file_hash: str
+    file_name: Optional[str] = None
+    valid: bool
+    message: str
+    found_in_system: bool
+    matches: List[DocumentHashMatch] = []
+
+class VerifyIntegrityFileResponse(BaseModel):
+    valid: bool
+    message: str
+    found_in_system: bool
+    file_hash: str
+    file_size: int
+    matches: List[DocumentHashMatch] = []
+    storage_status: Optional[str] = None  # intact, corrupted, missing
+
+class VerifyIntegrityBatchResponse(BaseModel):
+    total: int
+    found: int
+    results: List[VerifyIntegrityBatchItem]
+
+
+# Utility Functions
+def calculate_file_hash(file_path: Path) -> str:
+    """Calculate SHA-256 hash of a file"""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+async def save_upload(file: UploadFile) -> tuple:
+    """Copy an upload to a temporary file in chunks, hashing it during the copy.
+
+    Starlette has already spooled the whole request body (to memory or a temp
+    file) before the handler runs, so this is a second pass over the bytes and
+    the MAX_UPLOAD_SIZE check only stops the copy, not the receipt of the body.
+    Returns (temporary path, sha256 hex digest, size). The caller moves the
+    file into the blob store with store_blob.
+    """
+    sha256_hash = hashlib.sha256()
+    size = 0
+    tmp_path = BLOBS_TMP_DIR / f"{uuid.uuid4()}.part"
+    f = await io_executor.run(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"El archivo excede el tamaño máximo permitido ({MAX_UPLOAD_SIZE} bytes)"
+                )
+            sha256_hash.update(chunk)
+            await io_executor.run(f.write, chunk)
+        await io_executor.run(f.close)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise
+    return tmp_path, sha256_hash.hexdigest(), size
+
+async def hash_upload(file: UploadFile, max_size: int = MAX_UPLOAD_SIZE) -> tuple:
+    """SHA-256 of an upload, read back in chunks from Starlette's spooled copy.
+
+    The body has already been received in full; max_size bounds the hashing
+    work, not the upload. Nothing is kept. Returns (digest, size).
+    """
+    sha256_hash = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"El archivo excede el tamaño máximo permitido ({max_size} bytes)"
+            )
+        sha256_hash.update(chunk)
+    return sha256_hash.hexdigest(), size
+
+# Content-addressed blob storage
+def blob_key(file_hash: str) -> str:
+    """Storage key of the blob holding the bytes with the given SHA-256"""
+    return f"blobs/{file_hash[:2]}/{file_hash[2:4]}/{file_hash}"
+
+def signature_data_key(signed_hash: str) -> str:
+    """Storage key of the signature metadata stored next to a signed PDF"""
+    return f"signed/{signed_hash}_data.json"
+
+async def add_blob_reference(file_hash: str, size: int):
+    """Increment the reference count of a blob"""
+    await db.blobs.update_one(
+        {"hash": file_hash},
+        {
+            "$inc": {"ref_count": 1},
+            "$setOnInsert": {
+                "size": size,
+                "created_at": datetime.now(timezone.utc)
+            }
+        },
+        upsert=True
+    )
+
+async def store_blob(tmp_path: Path, file_hash: str, size: int) -> str:
+    """Move a freshly written temp file into the storage backend and reference it.
+
+    Returns the backend location to keep in file_path fields.
+    """
+    key = blob_key(file_hash)
+    await io_executor.run(storage.put_file, key, tmp_path, True)
+    await add_blob_reference(file_hash, size)
+    return storage.location(key)
+
+async def ensure_blob(file_hash: str, file_path: Optional[str]) -> Optional[int]:
+    """Size of the blob for file_hash, importing it from a local file_path if needed.
+
+    Covers files written before the current storage backend was configured
+    (legacy storage/contracts files, local blobs after switching to s3);
+    migrate-storage does the same for every document at once. Returns None
+    if the bytes cannot be found anywhere and raises 409 if the legacy file
+    no longer hashes to file_hash, so damaged bytes are never stored under it.
+    """
+    key = blob_key(file_hash)
+    size = await io_executor.run(storage.size, key)
+    if size is not None:
+        return size
+    
+    legacy_path = Path(file_path) if file_path and '://' not in file_path else None
+    if legacy_path is None or not await io_executor.run(legacy_path.exists):
+        return None
+    legacy_hash = await io_executor.run(calculate_file_hash, legacy_path)
+    if legacy_hash != file_hash:
+        logger.error(f"Legacy file {legacy_path} hashes to {legacy_hash}, expected {file_hash}")
+        raise HTTPException(status_code=409, detail="El archivo almacenado no coincide con su hash")
+    await io_executor.run(storage.put_file, key, legacy_path, False)
+    return await io_executor.run(storage.size, key)
+
+def hash_stored_object(key: str, size: int) -> str:
+    """SHA-256 of a stored object, read in chunks (blocking; run in io_executor)"""
+    sha256_hash = hashlib.sha256()
+    if size:
+        for chunk in storage.iter_range(key, 0, size - 1, DOWNLOAD_CHUNK_SIZE):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+async def collect_garbage_blobs(dry_run: bool = False) -> Dict:
+    """Delete blobs no longer referenced by any contract or signed request.
+
+    References are recomputed from the contracts and signature_requests
+    collections, which also corrects any drift in the stored ref_count.
+    """
+    cutoff = time.time() - BLOB_GC_GRACE_SECONDS
+    
+    def list_candidates():
+        for path in BLOBS_TMP_DIR.iterdir():
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+        return [key.rsplit("/", 1)[-1] for key in storage.list_keys("blobs/", cutoff)]
+    
+    candidates = await io_executor.run(list_candidates)
+    removed = []
+    batch_size = 500
+    for i in range(0, len(candidates), batch_size):
+        batch = candidates[i:i + batch_size]
+        counts = {h: 0 for h in batch}
+        async for doc in db.contracts.find({"file_hash": {"$in": batch}}, {"_id": 0, "file_hash": 1}):
+            counts[doc['file_hash']] += 1
+        async for doc in db.signature_requests.find({"signed_file_hash": {"$in": batch}}, {"_id": 0, "signed_file_hash": 1}):
+            counts[doc['signed_file_hash']] += 1
+        
+        for file_hash, count in counts.items():
+            if count:
+                if not dry_run:
+                    await db.blobs.update_one({"hash": file_hash}, {"$set": {"ref_count": count}})
+                continue
+            removed.append(file_hash)
+            if not dry_run:
+                await db.blobs.delete_one({"hash": file_hash})
+                await io_executor.run(storage.delete, blob_key(file_hash))
+    
+    return {"scanned": len(candidates), "removed": removed, "dry_run": dry_run}
+
+async def migrate_storage(dry_run: bool = False) -> Dict:
+    """Copy every contract, signed PDF and signature metadata file into the
+    configured storage backend and point file_path fields at it.
+
+    Sources are the paths recorded in the documents or the local blob store.
+    Each copy is re-hashed before upload. Documents already pointing at the
+    backend are skipped, so the command can be interrupted and re-run.
+    """
+    local = LocalStorage(STORAGE_DIR, BLOBS_TMP_DIR)
+    result = {"backend": storage.name, "copied": 0, "updated": 0, "skipped": 0, "missing": [], "corrupt": [], "dry_run": dry_run}
+    
+    async def migrate_file(key: str, file_hash: Optional[str], recorded_path: Optional[str]) -> bool:
+        if await io_executor.run(storage.size, key) is not None:
+            return True
+        candidates = [local.path(key)]
+        if recorded_path and '://' not in recorded_path:
+            candidates.insert(0, Path(recorded_path))
+        for source in candidates:
+            if not await io_executor.run(source.exists):
+                continue
+            if file_hash and await io_executor.run(calculate_file_hash, source) != file_hash:
+                result["corrupt"].append(str(source))
+                return False
+            if not dry_run:
+                await io_executor.run(storage.put_file, key, source, False)
+            result["copied"] += 1
+            return True
+        result["missing"].append(key)
+        return False
+    
+    sources = [
+        (db.contracts, "file_hash", "file_path"),
+        (db.signature_requests, "signed_file_hash", "signed_file_path"),
+    ]
+    for collection, hash_field, path_field in sources:
+        query = {hash_field: {"$ne": None}}
+        async for doc in collection.find(query, {"_id": 0, "id": 1, hash_field: 1, path_field: 1}):
+            key = blob_key(doc[hash_field])
+            if doc.get(path_field) == storage.location(key):
+                result["skipped"] += 1
+                continue
+            if not await migrate_file(key, doc[hash_field], doc.get(path_field)):
+                continue
+            if hash_field == "signed_file_hash":
+                await migrate_file(signature_data_key(doc[hash_field]), None, None)
+            if not dry_run:
+                await collection.update_one({"id": doc['id']}, {"$set": {path_field: storage.location(key)}})
+            result["updated"] += 1
+    
+    contract_cache.clear()
+    return result
+
+# AcroForm field flags (PDF 1.7, section 12.7)
+FIELD_FLAG_READ_ONLY = 1 << 0
+FIELD_FLAG_REQUIRED = 1 << 1
+FIELD_FLAG_MULTILINE = 1 << 12
+FIELD_FLAG_RADIO = 1 << 15
+FIELD_FLAG_PUSHBUTTON = 1 << 16
+FIELD_FLAG_COMBO = 1 << 17
+
+# Bump when extract_pdf_fields changes so cached schemas are rebuilt
+PDF_SCHEMA_VERSION = 2
+
+def pdf_name(value) -> Optional[str]:
+    """Text value of a PDF name or string ('/Yes' -> 'Yes')"""
+    if value is None:
+        return None
+    value = pdf_resolve(value)
+    if isinstance(value, list):
+        return [pdf_name(item) for item in value]
+    text = str(value)
+    return text[1:] if text.startswith('/') else text
+
+def pdf_resolve(value):
+    """Dereference a PDF indirect object"""
+    return value.get_object() if hasattr(value, 'get_object') else value
+
+def pdf_field_type(field_type: Optional[str], flags: int) -> str:
+    if field_type == '/Btn':
+        if flags & FIELD_FLAG_PUSHBUTTON:
+            return "button"
+        return "radio" if flags & FIELD_FLAG_RADIO else "checkbox"
+    if field_type == '/Ch':
+        return "combo" if flags & FIELD_FLAG_COMBO else "list"
+    if field_type == '/Sig':
+        return "signature"
+    return "text"
+
+def read_acroform_fields(pdf_reader: PyPDF2.PdfReader) -> List[Dict]:
+    """Walk the AcroForm field tree of an open PDF.
+
+    Returns one entry per terminal field with its schema plus a private
+    "_widgets" list holding the widget annotation references.
+    """
+    fields = []
+    root = pdf_reader.trailer['/Root']
+    if '/AcroForm' not in root or '/Fields' not in pdf_resolve(root['/AcroForm']):
+        return fields
+    
+    # Map widget annotations and page objects to page numbers
+    annotation_pages = {}
+    page_numbers = {}
+    for number, page in enumerate(pdf_reader.pages, start=1):
+        if page.indirect_reference is not None:
+            page_numbers[page.indirect_reference.idnum] = number
+        for annotation in pdf_resolve(page.get('/Annots')) or []:
+            if hasattr(annotation, 'idnum'):
+                annotation_pages[annotation.idnum] = number
+    
+    def widget_info(widget_ref) -> Dict:
+        widget = widget_ref.get_object()
+        page = annotation_pages.get(getattr(widget_ref, 'idnum', None))
+        if page is None and '/P' in widget:
+            page = page_numbers.get(getattr(widget.raw_get('/P'), 'idnum', None))
+        rect = [round(float(v), 2) for v in widget['/Rect']] if '/Rect' in widget else None
+        states = []
+        if '/AP' in widget and '/N' in widget['/AP']:
+            appearances = pdf_resolve(widget['/AP']['/N'])
+            if hasattr(appearances, 'keys'):
+                states = [pdf_name(key) for key in appearances.keys() if key != '/Off']
+        return {"ref": widget_ref, "page": page, "rect": rect, "states": states}
+    
+    def walk(field_ref, parent_name: Optional[str], inherited: Dict):
+        field = field_ref.get_object()
+        partial = pdf_name(field.get('/T'))
+        name = ".".join(part for part in (parent_name, partial) if part)
+        attrs = dict(inherited)
+        for key in ('/FT', '/Ff', '/DV', '/V', '/Opt'):
+            if key in field:
+                attrs[key] = field[key]
+        
+        kids = list(pdf_resolve(field.get('/Kids')) or [])
+        child_fields = [kid for kid in kids if '/T' in kid.get_object()]
+        if child_fields:
+            for kid in child_fields:
+                walk(kid, name, attrs)
+            return
+        
+        flags = int(attrs.get('/Ff', 0))
+        field_type = pdf_field_type(attrs.get('/FT'), flags)
+        widgets = [widget_info(kid) for kid in kids] if kids else [widget_info(field_ref)]
+        
+        options = []
+        if '/Opt' in attrs:
+            for option in pdf_resolve(attrs['/Opt']):
+                option = pdf_resolve(option)
+                if isinstance(option, list):
+                    options.append({"value": pdf_name(option[0]), "label": pdf_name(option[1])})
+                else:
+                    options.append({"value": pdf_name(option), "label": pdf_name(option)})
+        elif field_type in ("radio", "checkbox"):
+            for state in dict.fromkeys(s for w in widgets for s in w['states']):
+                options.append({"value": state, "label": state})
+        
+        fields.append({
+            "name": name,
+            "type": field_type,
+            "page": widgets[0]['page'],
+            "rect": widgets[0]['rect'],
+            "widgets": [{"page": w['page'], "rect": w['rect']} for w in widgets],
+            "options": options,
+            "required": bool(flags & FIELD_FLAG_REQUIRED),
+            "read_only": bool(flags & FIELD_FLAG_READ_ONLY),
+            "multiline": field_type == "text" and bool(flags & FIELD_FLAG_MULTILINE),
+            "max_length": int(field['/MaxLen']) if '/MaxLen' in field else None,
+            "default": pdf_name(attrs.get('/DV')),
+            "_value": pdf_name(attrs.get('/V')),
+            "_widgets": widgets
+        })
+    
+    for field_ref in pdf_resolve(pdf_resolve(root['/AcroForm'])['/Fields']):
+        walk(field_ref, None, {})
+    return fields
+
+def extract_pdf_fields(file_path: Path) -> List[Dict]:
+    """Extract the AcroForm field schema of a PDF.
+
+    Each field reports its fully qualified name, type, page (1-based),
+    bounding box, choices, required/read-only flags and default value.
+    """
+    try:
+        pdf_reader = PyPDF2.PdfReader(str(file_path))
+        return [
+            {key: value for key, value in field.items() if not key.startswith('_')}
+            for field in read_acroform_fields(pdf_reader)
+        ]
+    except Exception as e:
+        logger.warning(f"Could not extract PDF fields: {str(e)}")
+        return []
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition for any filename: RFC 6266 filename* plus an ASCII fallback"""
+    fallback = "".join(c if " " <= c <= "~" and c not in '"\\' else "_" for c in filename)
+    if fallback == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename=\"{fallback}\"; filename*=utf-8''{quote(filename, safe='')}"
+
+def parse_range_header(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single 'bytes=start-end' range into inclusive offsets.
+
+    Returns None when the header should be ignored (multiple ranges, an
+    unknown unit or an invalid spec such as last < first, RFC 7233 section
+    3.1) and raises 416 when a valid range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start:
+            first = int(start)
+            last = int(end) if end else size - 1
+            if end and last < first:
+                return None
+        else:
+            first = max(size - int(end), 0)
+            last = size - 1
+    except ValueError:
+        return None
+    last = min(last, size - 1)
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Rango no satisfacible",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return first, last
+
+async def open_blob_range(key: str, first: int, last: int):
+    """Read the first chunk of a stored object range and return an async iterator over it.
+
+    The first read goes through io_executor, so a saturated pool is refused
+    with 503 before any response headers are sent; the rest of the body is
+    read with asyncio.to_thread and is never cut off mid-stream.
+    """
+    chunks = storage.iter_range(key, first, last, DOWNLOAD_CHUNK_SIZE)
+    try:
+        chunk = await io_executor.run(next, chunks, None)
+    except BaseException:
+        await asyncio.to_thread(chunks.close)
+        raise
+    return iter_blob_chunks(chunks, chunk)
+
+async def iter_blob_chunks(chunks, chunk: Optional[bytes]):
+    try:
+        while chunk is not None:
+            yield chunk
+            chunk = await asyncio.to_thread(next, chunks, None)
+    finally:
+        await asyncio.to_thread(chunks.close)
+
+async def file_download_response(request: Request, file_hash: str, file_path: Optional[str], filename: str) -> Response:
+    """Serve a stored PDF with a strong ETag (its SHA-256), conditional GET and Range support"""
+    etag = f'"{file_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=304, headers=headers)
+    
+    size = await ensure_blob(file_hash, file_path)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    key = blob_key(file_hash)
+    
+    if STORAGE_PRESIGNED_DOWNLOADS:
+        url = await io_executor.run(storage.presigned_url, key, filename, STORAGE_PRESIGNED_EXPIRY)
+        if url:
+            return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+    
+    first, last = 0, size - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size and (not if_range or if_range.strip() == etag):
+        byte_range = parse_range_header(range_header, size)
+        if byte_range:
+            first, last = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    
+    headers["Content-Length"] = str(last - first + 1)
+    headers["Content-Disposition"] = content_disposition(filename)
+    return StreamingResponse(
+        await open_blob_range(key, first, last) if size else iter(()),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers
+    )
+
+def generate_otp() -> str:
+    """Generate 6-digit OTP"""
+    return str(secrets.randbelow(1000000)).zfill(6)
+
+def build_email(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    """Build an HTML email message"""
+    message = MIMEMultipart('alternative')
+    message['From'] = os.environ.get('SMTP_USER', 'sistema.contratos@academiajotuns.com')
+    message['To'] = to_email
+    message['Subject'] = subject
+    
+    html_part = MIMEText(body, 'html')
+    message.attach(html_part)
+    return message
+
+async def send_email(to_email: str, subject: str, body: str) -> bool:
+    """Send email via SMTP"""
+    try:
+        return await smtp_pool.send(build_email(to_email, subject, body))
+    except Exception as e:
+        logger.error(f"Error sending email: {str(e)}")
+        return False
+
+async def send_email_batch(emails: List[Dict]) -> List[bool]:
+    """Send many emails ({to_email, subject, body}) over one SMTP session"""
+    try:
+        return await smtp_pool.send_batch([build_email(**email) for email in emails])
+    except Exception as e:
+        logger.error(f"Error sending email batch: {str(e)}")
+        return [False] * len(emails)
+
+async def send_sms(phone: str, message: str) -> bool:
+    """Send SMS via the configured provider (TextMeBot by default)"""
+    try:
+        return await sms_provider.send(http_client.session, phone, message)
+    except Exception as e:
+        logger.error(f"Error sending SMS: {str(e)}")
+        return False
+
+def encode_cursor(doc: Dict) -> str:
+    """Build an opaque pagination cursor from the last document of a page"""
+    created_at = doc['created_at']
+    if isinstance(created_at, datetime):
+        created_at = as_utc(created_at).isoformat()
+    payload = json.dumps({"created_at": created_at, "id": doc['id']})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str) -> Dict:
+    """Decode a pagination cursor produced by encode_cursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return {"created_at": as_utc(datetime.fromisoformat(payload['created_at'])), "id": payload['id']}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def to_db_timestamp(value: datetime) -> datetime:
+    """Convert a datetime to the representation stored in MongoDB (UTC BSON date)"""
+    return as_utc(value)
+
+def build_date_range_query(field: str, date_from: Optional[datetime], date_to: Optional[datetime]) -> Dict:
+    """Build a MongoDB range filter for a timestamp field"""
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = to_db_timestamp(date_from)
+    if date_to:
+        bounds["$lte"] = to_db_timestamp(date_to)
+    return {field: bounds} if bounds else {}
+
+async def fetch_page(collection, query: Dict, limit: int, cursor: Optional[str], response: Response) -> List[Dict]:
+    """Fetch one page ordered by created_at/id descending using keyset pagination.
+
+    The cursor for the following page is returned in the X-Next-Cursor header.
+    """
+    if cursor:
+        last = decode_cursor(cursor)
+        query = {
+            "$and": [
+                query,
+                {"$or": [
+                    {"created_at": {"$lt": last['created_at']}},
+                    {"created_at": last['created_at'], "id": {"$lt": last['id']}}
+                ]}
+            ]
+        }
+    
+    docs = await collection.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    return docs
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def export_value(value):
+    """JSON-friendly value for one exported field"""
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return value
+
+async def iter_export(cursor, columns: List[str], export_format: str, compress: bool):
+    """Encode documents from a Motor cursor as NDJSON or CSV while they arrive.
+
+    Output is flushed every EXPORT_CHUNK_SIZE bytes, so memory use depends on
+    the cursor batch size and not on the number of documents exported.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(columns)
+    
+    def take_chunk() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+    
+    async for doc in cursor:
+        row = {column: export_value(doc.get(column)) for column in columns}
+        if writer:
+            writer.writerow([
+                json.dumps(value, default=str, ensure_ascii=False) if isinstance(value, (dict, list)) else ("" if value is None else value)
+                for value in row.values()
+            ])
+        else:
+            buffer.write(json.dumps(row, default=str, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            chunk = take_chunk()
+            if chunk:
+                yield chunk
+    
+    chunk = take_chunk()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+def export_response(cursor, columns: List[str], name: str, export_format: str, compress: bool) -> StreamingResponse:
+    extension = f"{export_format}.gz" if compress else export_format
+    filename = f"{name}_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.{extension}"
+    return StreamingResponse(
+        iter_export(cursor, columns, export_format, compress),
+        media_type="application/gzip" if compress else EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def as_utc(value: datetime) -> datetime:
+    """Return a timezone-aware UTC datetime (MongoDB returns naive UTC values)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def build_audit_doc(request_id: str, action: str, details: Dict, ip_address: str = None, user_agent: str = None) -> Dict:
+    """Build an audit log document ready for insertion"""
+    # MongoDB keeps milliseconds; truncate now so the chained hash survives a round trip
+    now = datetime.now(timezone.utc)
+    audit = AuditLog(
+        request_id=request_id,
+        action=action,
+        details=details,
+        timestamp=now.replace(microsecond=now.microsecond // 1000 * 1000),
+        ip_address=ip_address,
+        user_agent=user_agent
+    )
+    # Chain fields are set by chain_audit_entries; an entry without them is unchained
+    return audit.model_dump(exclude=set(AUDIT_CHAIN_FIELDS))
+
+async def log_audit(request_id: str, action: str, details: Dict, ip_address: str = None, user_agent: str = None, durable: Optional[bool] = None):
+    """Create audit log entry.
+
+    Entries are buffered; durable ones (by default the actions listed in
+    AUDIT_DURABLE_ACTIONS) are written before this returns.
+    """
+    if durable is None:
+        durable = action in AUDIT_DURABLE_ACTIONS
+    await audit_writer.write(build_audit_doc(request_id, action, details, ip_address, user_agent), durable=durable)
+
+
+# Notification Queue
+notification_wakeup = asyncio.Event()
+notification_tasks: List[asyncio.Task] = []
+
+def build_notification(channel: str, to: str, body: str, request_id: str, subject: Optional[str] = None) -> Dict:
+    """Build a queued notification document"""
+    now = datetime.now(timezone.utc)
+    return {
+        "id": str(uuid.uuid4()),
+        "channel": channel,
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "request_id": request_id,
+        "status": "queued",
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "locked_until": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+async def enqueue_notification(channel: str, to: str, body: str, request_id: str, subject: Optional[str] = None) -> str:
+    """Persist an outbound email/SMS for delivery by the notification workers"""
+    notification = build_notification(channel, to, body, request_id, subject)
+    await db.notifications.insert_one(notification)
+    notification_wakeup.set()
+    return notification['id']
+
+async def enqueue_notifications(notifications: List[Dict]) -> int:
+    """Persist many notifications, inserting in NOTIFICATION_BATCH_SIZE batches"""
+    for i in range(0, len(notifications), NOTIFICATION_BATCH_SIZE):
+        await db.notifications.insert_many(notifications[i:i + NOTIFICATION_BATCH_SIZE], ordered=False)
+    if notifications:
+        notification_wakeup.set()
+    return len(notifications)
+
+def due_notifications_query(now: datetime) -> Dict:
+    """Notifications ready to send, including ones whose worker died"""
+    return {
+        "$or": [
+            {"status": "queued", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lte": now}}
+        ]
+    }
+
+def notification_claim(now: datetime) -> Dict:
+    return {
+        "status": "sending",
+        "locked_until": now + timedelta(seconds=NOTIFICATION_LOCK_SECONDS),
+        "updated_at": now
+    }
+
+async def extend_email_batch_lease(notifications: List[Dict]):
+    """Keep a claimed email batch locked for as long as sending it can take.
+
+    Each message may need a send and a reconnect, each bounded by SMTP_TIMEOUT,
+    so no other worker reclaims (and sends again) a batch still in progress.
+    """
+    now = datetime.now(timezone.utc)
+    lease = NOTIFICATION_LOCK_SECONDS + len(notifications) * 2 * SMTP_TIMEOUT
+    await db.notifications.update_many(
+        {"id": {"$in": [n['id'] for n in notifications]}, "status": "sending"},
+        {"$set": {"locked_until": now + timedelta(seconds=lease), "updated_at": now}}
+    )
+
+async def claim_notification() -> Optional[Dict]:
+    """Atomically take the next due notification"""
+    now = datetime.now(timezone.utc)
+    return await db.notifications.find_one_and_update(
+        due_notifications_query(now),
+        {"$set": notification_claim(now)},
+        sort=[("next_attempt_at", ASCENDING)],
+        projection={"_id": 0}
+    )
+
+async def claim_notifications(channel: str, limit: int) -> List[Dict]:
+    """Take up to limit due notifications of one channel.
+
+    Candidates are tagged with a claim id by a single update_many conditioned
+    on still being due, so each one is claimed by exactly one worker.
+    """
+    if limit <= 0:
+        return []
+    now = datetime.now(timezone.utc)
+    query = {"channel": channel, **due_notifications_query(now)}
+    ids = [doc['id'] async for doc in db.notifications.find(query, {"_id": 0, "id": 1}).sort(
+        "next_attempt_at", ASCENDING
+    ).limit(limit)]
+    if not ids:
+        return []
+    claim_id = str(uuid.uuid4())
+    await db.notifications.update_many(
+        {"id": {"$in": ids}, **query},
+        {"$set": {**notification_claim(now), "claim_id": claim_id}}
+    )
+    return await db.notifications.find({"claim_id": claim_id}, {"_id": 0}).to_list(limit)
+
+async def deliver_notification(notification: Dict):
+    """Send one notification and record the outcome"""
+    if notification['channel'] == "email":
+        delivered = await send_email(notification['to'], notification['subject'], notification['body'])
+    else:
+        delivered = await send_sms(notification['to'], notification['body'])
+    await record_delivery(notification, delivered)
+
+async def deliver_email_batch(notifications: List[Dict]):
+    """Send claimed email notifications over one pooled SMTP session"""
+    results = await send_email_batch([
+        {"to_email": n['to'], "subject": n['subject'], "body": n['body']}
+        for n in notifications
+    ])
+    for notification, delivered in zip(notifications, results):
+        await record_delivery(notification, delivered)
+
+async def record_delivery(notification: Dict, delivered: bool):
+    """Record the outcome of a delivery attempt, scheduling a retry on failure.
+
+    Once a notification is sent or dead its body (which may hold an OTP) is
+    removed and the document expires after NOTIFICATION_RETENTION_SECONDS.
+    """
+    attempts = notification['attempts'] + 1
+    now = datetime.now(timezone.utc)
+    if delivered:
+        update = {"status": "sent", "attempts": attempts, "sent_at": now}
+        action = "notification_sent"
+    elif attempts >= NOTIFICATION_MAX_ATTEMPTS:
+        update = {"status": "dead", "attempts": attempts, "last_error": "delivery_failed"}
+        action = "notification_failed"
+    else:
+        delay = min(NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), NOTIFICATION_RETRY_MAX_SECONDS)
+        update = {
+            "status": "queued",
+            "attempts": attempts,
+            "last_error": "delivery_failed",
+            "next_attempt_at": now + timedelta(seconds=delay)
+        }
+        action = None
+    
+    update.update({"locked_until": None, "updated_at": now})
+    changes = {}
+    if update['status'] != "queued":
+        update['expires_at'] = now + timedelta(seconds=NOTIFICATION_RETENTION_SECONDS)
+        changes["$unset"] = {"body": ""}
+    await db.notifications.update_one({"id": notification['id']}, {"$set": update, **changes})
+    
+    if action:
+        await log_audit(
+            request_id=notification['request_id'],
+            action=action,
+            details={
+                "notification_id": notification['id'],
+                "channel": notification['channel'],
+                "attempts": attempts
+            }
+        )
+
+async def notification_worker():
+    """Deliver queued notifications until cancelled"""
+    while True:
+        try:
+            notification = await claim_notification()
+            if notification and notification['channel'] == "email" and NOTIFICATION_EMAIL_BATCH_SIZE > 1:
+                # Bulk campaigns: take more due emails and reuse one SMTP session for all of them
+                batch = [notification] + await claim_notifications("email", NOTIFICATION_EMAIL_BATCH_SIZE - 1)
+                if len(batch) > 1:
+                    await extend_email_batch_lease(batch)
+                await deliver_email_batch(batch)
+                continue
+            if notification:
+                await deliver_notification(notification)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Notification worker error: {str(e)}")
+        
+        notification_wakeup.clear()
+        try:
+            await asyncio.wait_for(notification_wakeup.wait(), timeout=NOTIFICATION_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def start_notification_workers():
+    for _ in range(NOTIFICATION_WORKERS):
+        notification_tasks.append(asyncio.create_task(notification_worker()))
+
+async def stop_notification_workers():
+    for task in notification_tasks:
+        task.cancel()
+    await asyncio.gather(*notification_tasks, return_exceptions=True)
+    notification_tasks.clear()
+
+
+# PDF Signing Pipeline
+SIGNATURE_FONT = '/SigHelv'
+UNCHECKED_VALUES = {"", "off", "false", "0", "no", "none"}
+
+def pdf_text(value) -> bytes:
+    """Encode text as a PDF literal string for the standard Helvetica font"""
+    data = str(value).encode('cp1252', errors='replace')
+    data = data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + data.replace(b'\r', b'') + b')'
+
+def pdf_stream(data: bytes) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return stream
+
+def draw_field(field: Dict, widget: Dict, value) -> bytes:
+    """Content stream operators painting a field value inside its widget rectangle"""
+    if value is None or widget['rect'] is None or field['type'] in ("button", "signature"):
+        return b""
+    x1, y1, x2, y2 = widget['rect']
+    x1, x2 = min(x1, x2), max(x1, x2)
+    y1, y2 = min(y1, y2), max(y1, y2)
+    width, height = x2 - x1, y2 - y1
+    
+    if field['type'] in ("checkbox", "radio"):
+        if field['type'] == "radio":
+            checked = str(value) in widget['states']
+        else:
+            checked = value is True or str(value).strip().lower() not in UNCHECKED_VALUES
+        if not checked:
+            return b""
+        size = min(width, height) * 0.8
+        x = x1 + (width - size * 0.667) / 2
+        y = y1 + (height - size * 0.7) / 2
+        return b"BT %s %.2f Tf %.2f %.2f Td (X) Tj ET\n" % (SIGNATURE_FONT.encode(), size, x, y)
+    
+    labels = {option['value']: option['label'] for option in field['options']}
+    text = labels.get(str(value), str(value))
+    if not text:
+        return b""
+    if field['multiline']:
+        size = 9.0
+        lines = text.split("\n")
+        y = y2 - size - 2
+    else:
+        size = max(min(10.0, height * 0.7), 4.0)
+        lines = [text.replace("\n", " ")]
+        y = y1 + (height - size) / 2 + 1.5
+    
+    ops = b"BT %s %.2f Tf %.2f TL %.2f %.2f Td" % (SIGNATURE_FONT.encode(), size, size * 1.2, x1 + 2, y)
+    for i, line in enumerate(lines):
+        ops += (b" T* " if i else b" ") + pdf_text(line) + b" Tj"
+    return ops + b" ET\n"
+
+def wrap_text(text: str, width: int) -> List[str]:
+    text = str(text)
+    return [text[i:i + width] for i in range(0, len(text), width)] or [""]
+
+def audit_page_content(info: Dict, page_width: float, page_height: float) -> bytes:
+    """Content stream of the signature/audit page appended to signed contracts"""
+    rows = [
+        ("Contrato", info.get('contract_name')),
+        ("ID del contrato", info.get('contract_id')),
+        ("ID de la solicitud", info.get('request_id')),
+        ("Firmante", info.get('signer_name')),
+        ("Correo electrónico", info.get('signer_email')),
+        ("Teléfono", info.get('signer_phone')),
+        ("Dirección IP", info.get('ip_address')),
+        ("Navegador (User-Agent)", info.get('user_agent')),
+        ("Fecha de firma (UTC)", info.get('signed_at')),
+        ("Método de verificación", "Código OTP de un solo uso"),
+        ("Hash SHA-256 del documento original", info.get('original_file_hash')),
+    ]
+    left, top = 50, page_height - 60
+    ops = [
+        b"BT %s 16 Tf %d %d Td %s Tj ET" % (
+            SIGNATURE_FONT.encode(), left, top, pdf_text("Registro de Firma Electrónica")
+        ),
+        b"BT %s 10 Tf 14 TL %d %d Td" % (SIGNATURE_FONT.encode(), left, top - 36),
+    ]
+    chars_per_line = max(int((page_width - 2 * left) / 5.2), 20)
+    for label, value in rows:
+        ops.append(pdf_text(f"{label}:") + b" Tj T*")
+        for line in wrap_text(value if value else "-", chars_per_line - 4):
+            ops.append(pdf_text(f"    {line}") + b" Tj T*")
+        ops.append(b"T*")
+    ops.append(b"ET")
+    footer = "Documento firmado electrónicamente - Ley 527 de 1999 y Decreto 2364 de 2012 - Academia Jotuns Club SAS"
+    ops.append(b"BT %s 8 Tf %d 40 Td %s Tj ET" % (SIGNATURE_FONT.encode(), left, pdf_text(footer)))
+    return b"\n".join(ops) + b"\n"
+
+class IncrementalUpdate:
+    """Collect changed and new objects and append them to a PDF as an incremental update.
+
+    Existing bytes are never rewritten: the update adds the objects, a new
+    cross-reference section (table or stream, matching the original) and a
+    trailer pointing back to the previous one with /Prev.
+    """
+    
+    def __init__(self, reader: PyPDF2.PdfReader):
+        self.reader = reader
+        known_ids = [idnum for entries in reader.xref.values() for idnum in entries]
+        known_ids.extend(reader.xref_objStm.keys())
+        self.next_id = max([int(reader.trailer.get('/Size', 0)), *(i + 1 for i in known_ids)])
+        self.objects = {}
+    
+    def add(self, obj) -> IndirectObject:
+        ref = IndirectObject(self.next_id, 0, self.reader)
+        self.next_id += 1
+        self.objects[ref.idnum] = (0, obj)
+        return ref
+    
+    def replace(self, ref: IndirectObject, obj):
+        self.objects[ref.idnum] = (ref.generation, obj)
+    
+    @staticmethod
+    def previous_xref(source) -> tuple:
+        """Offset of the last cross-reference section and whether it is a stream"""
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(max(0, size - 2048))
+        tail = source.read()
+        position = tail.rfind(b"startxref")
+        if position < 0:
+            raise ValueError("PDF sin startxref")
+        offset = int(tail[position + 9:].split()[0])
+        source.seek(offset)
+        return offset, not source.read(4).startswith(b"xref")
+    
+    def write(self, out, start: int, prev_xref: int, xref_is_stream: bool):
+        """Write the update to out; start is the byte offset where it begins"""
+        offsets = {}
+        position = start
+        
+        def emit(data: bytes):
+            nonlocal position
+            out.write(data)
+            position += len(data)
+        
+        emit(b"\n")
+        for idnum in sorted(self.objects):
+            generation, obj = self.objects[idnum]
+            offsets[idnum] = (position, generation)
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer, None)
+            emit(b"%d %d obj\n" % (idnum, generation) + buffer.getvalue() + b"\nendobj\n")
+        
+        trailer = DictionaryObject()
+        trailer[NameObject('/Root')] = self.reader.trailer.raw_get('/Root')
+        if '/Info' in self.reader.trailer:
+            trailer[NameObject('/Info')] = self.reader.trailer.raw_get('/Info')
+        if '/ID' in self.reader.trailer:
+            original_id = pdf_resolve(self.reader.trailer['/ID'])
+            trailer[NameObject('/ID')] = ArrayObject([
+                original_id[0], ByteStringObject(secrets.token_bytes(16))
+            ])
+        trailer[NameObject('/Prev')] = NumberObject(prev_xref)
+        
+        xref_offset = position
+        if xref_is_stream:
+            xref_id = self.next_id
+            offsets[xref_id] = (xref_offset, 0)
+        ids = sorted(offsets)
+        sections = []
+        for idnum in ids:
+            if sections and sections[-1][0] + len(sections[-1][1]) == idnum:
+                sections[-1][1].append(idnum)
+            else:
+                sections.append((idnum, [idnum]))
+        trailer[NameObject('/Size')] = NumberObject(max(self.next_id + (1 if xref_is_stream else 0), ids[-1] + 1))
+        
+        if xref_is_stream:
+            data = b"".join(
+                b"\x01" + offsets[idnum][0].to_bytes(4, "big") + offsets[idnum][1].to_bytes(2, "big")
+                for idnum in ids
+            )
+            xref_stream = pdf_stream(data)
+            xref_stream.update(trailer)
+            xref_stream[NameObject('/Type')] = NameObject('/XRef')
+            xref_stream[NameObject('/W')] = ArrayObject([NumberObject(1), NumberObject(4), NumberObject(2)])
+            xref_stream[NameObject('/Index')] = ArrayObject(
+                [NumberObject(n) for first, run in sections for n in (first, len(run))]
+            )
+            buffer = io.BytesIO()
+            xref_stream.write_to_stream(buffer, None)
+            emit(b"%d 0 obj\n" % xref_id + buffer.getvalue() + b"\nendobj\n")
+        else:
+            emit(b"xref\n0 1\n0000000000 65535 f\r\n")
+            for first, run in sections:
+                emit(b"%d %d\n" % (first, len(run)))
+                for idnum in run:
+                    emit(b"%010d %05d n\r\n" % offsets[idnum])
+            buffer = io.BytesIO()
+            trailer.write_to_stream(buffer, None)
+            emit(b"trailer\n" + buffer.getvalue() + b"\n")
+        emit(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+
+def sign_pdf(source_path: str, output_path: str, form_data: Dict, signature_info: Dict) -> Dict:
+    """Fill and flatten the form, append the signature/audit page and write the
+    result to output_path as an incremental update of the original PDF.
+
+    Returns the SHA-256, size and page count of the signed document.
+    """
+    with open(source_path, "rb") as source:
+        reader = PyPDF2.PdfReader(source)
+        if reader.is_encrypted:
+            raise ValueError("No se pueden firmar PDFs cifrados")
+        prev_xref, xref_is_stream = IncrementalUpdate.previous_xref(source)
+        update = IncrementalUpdate(reader)
+        
+        font_ref = update.add(DictionaryObject({
+            NameObject('/Type'): NameObject('/Font'),
+            NameObject('/Subtype'): NameObject('/Type1'),
+            NameObject('/BaseFont'): NameObject('/Helvetica'),
+            NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+        }))
+        
+        # Paint every field value into its page and drop the widgets (flatten)
+        drawings = {}
+        for field in read_acroform_fields(reader):
+            value = form_data.get(field['name'], field['_value'])
+            for widget in field['_widgets']:
+                if widget['page']:
+                    drawings.setdefault(widget['page'], []).append(draw_field(field, widget, value))
+        
+        save_state_ref = update.add(pdf_stream(b"q\n")) if drawings else None
+        for number, page in enumerate(reader.pages, start=1):
+            annotations = pdf_resolve(page.get('/Annots')) or []
+            widgets = [a for a in annotations if pdf_resolve(a).get('/Subtype') == '/Widget']
+            if number not in drawings and not widgets:
+                continue
+            
+            kept = ArrayObject(a for a in annotations if a not in widgets)
+            if kept:
+                page[NameObject('/Annots')] = kept
+            elif '/Annots' in page:
+                del page['/Annots']
+            
+            if number in drawings:
+                contents = page.raw_get('/Contents') if '/Contents' in page else None
+                if isinstance(contents, IndirectObject) and isinstance(contents.get_object(), ArrayObject):
+                    contents = list(contents.get_object())
+                elif contents is None:
+                    contents = []
+                elif not isinstance(contents, ArrayObject):
+                    contents = [contents]
+                drawing_ref = update.add(pdf_stream(b"Q\n" + b"".join(drawings[number])))
+                page[NameObject('/Contents')] = ArrayObject([save_state_ref, *contents, drawing_ref])
+                
+                resources = DictionaryObject(pdf_resolve(page.get('/Resources')) or {})
+                fonts = DictionaryObject(pdf_resolve(resources.get('/Font')) or {})
+                fonts[NameObject(SIGNATURE_FONT)] = font_ref
+                resources[NameObject('/Font')] = fonts
+                page[NameObject('/Resources')] = resources
+            update.replace(page.indirect_reference, page)
+        
+        catalog_ref = reader.trailer.raw_get('/Root')
+        catalog = catalog_ref.get_object()
+        if '/AcroForm' in catalog:
+            del catalog['/AcroForm']
+        
+        # Append the signature/audit page
+        pages_ref = catalog.raw_get('/Pages')
+        pages = pages_ref.get_object()
+        media_box = reader.pages[0].mediabox if len(reader.pages) else RectangleObject([0, 0, 612, 792])
+        width, height = float(media_box.width), float(media_box.height)
+        audit_page_ref = update.add(DictionaryObject({
+            NameObject('/Type'): NameObject('/Page'),
+            NameObject('/Parent'): pages_ref,
+            NameObject('/MediaBox'): ArrayObject([NumberObject(0), NumberObject(0), FloatObject(width), FloatObject(height)]),
+            NameObject('/Resources'): DictionaryObject({
+                NameObject('/Font'): DictionaryObject({NameObject(SIGNATURE_FONT): font_ref})
+            }),
+            NameObject('/Contents'): update.add(pdf_stream(audit_page_content(signature_info, width, height))),
+        }))
+        pages[NameObject('/Kids')] = ArrayObject([*pdf_resolve(pages['/Kids']), audit_page_ref])
+        pages[NameObject('/Count')] = NumberObject(int(pages['/Count']) + 1)
+        update.replace(pages_ref, pages)
+        update.replace(catalog_ref, catalog)
+        
+        # Copy the original bytes untouched, then append the update
+        sha256_hash = hashlib.sha256()
+        
+        class HashingWriter:
+            def __init__(self, f):
+                self.f = f
+            
+            def write(self, data: bytes):
+                sha256_hash.update(data)
+                self.f.write(data)
+        
+        with open(output_path, "wb") as output:
+            writer = HashingWriter(output)
+            source.seek(0)
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                writer.write(chunk)
+            update.write(writer, output.tell(), prev_xref, xref_is_stream)
+            size = output.tell()
+    
+    return {"hash": sha256_hash.hexdigest(), "size": size, "pages": len(reader.pages) + 1}
+
+
+# PDF Form Schema
+async def get_pdf_schema(file_hash: str, file_path: Path) -> List[Dict]:
+    """Field schema for the PDF with this hash, parsed once and cached in MongoDB"""
+    cached = await db.pdf_schemas.find_one(
+        {"file_hash": file_hash, "version": PDF_SCHEMA_VERSION},
+        {"_id": 0, "fields": 1}
+    )
+    if cached:
+        return cached['fields']
+    
+    fields = await pdf_executor.run(extract_pdf_fields, file_path)
+    await db.pdf_schemas.update_one(
+        {"file_hash": file_hash},
+        {"$set": {
+            "fields": fields,
+            "version": PDF_SCHEMA_VERSION,
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    return fields
+
+
+# Contract Cache
+async def get_cached_contract(contract_id: str) -> Optional[Contract]:
+    """Load a contract by id, served from contract_cache when possible.
+
+    Contracts do not change after create_contract, so cached entries only
+    need invalidating when a contract is created or removed.
+    """
+    contract = contract_cache.get(contract_id)
+    if contract is None:
+        doc = await db.contracts.find_one({"id": contract_id}, {"_id": 0})
+        if not doc:
+            return None
+        contract = Contract(**doc)
+        contract_cache.set(contract_id, contract)
+    return contract
+
+
+# Statistics Counters
+# Totals and per-status counts live in one stats document; per-contract and
+# per-day counts live in stats_counters, one document per key, so no single
+# document grows with the number of contracts or days.
+STATS_ID = "dashboard"
+STATS_COUNTER_FIELDS = {"contract": "by_contract", "day": "by_day"}
+
+def stats_day(created_at) -> str:
+    """Day bucket (YYYY-MM-DD, UTC) used by the per-day counters"""
+    if isinstance(created_at, datetime):
+        return as_utc(created_at).strftime("%Y-%m-%d")
+    # Documents not yet converted by migrate-timestamps
+    return str(created_at)[:10]
+
+def stats_counter_id(kind: str, key: str) -> str:
+    return f"{kind}:{key}"
+
+async def increment_stats(inc: Dict, counters: Optional[Dict] = None):
+    """Atomically apply counter increments.
+
+    inc goes to the stats document; nothing is written there until it exists
+    (the first dashboard read or the reconciliation job creates it from the
+    raw collections). counters maps (kind, key) to increments for the
+    stats_counters documents, which are upserted.
+    """
+    if inc:
+        await db.stats.update_one({"_id": STATS_ID}, {"$inc": inc})
+    if counters:
+        await db.stats_counters.bulk_write([
+            UpdateOne(
+                {"_id": stats_counter_id(kind, key)},
+                {"$inc": counter_inc, "$setOnInsert": {"kind": kind, "key": key}},
+                upsert=True
+            )
+            for (kind, key), counter_inc in counters.items()
+        ], ordered=False)
+    dashboard_stats_cache.invalidate()
+
+async def record_requests_created(docs: List[Dict]):
+    inc, counters = {}, {}
+    for doc in docs:
+        for field in ("total_requests", f"by_status.{doc['status']}"):
+            inc[field] = inc.get(field, 0) + 1
+        for counter in (("contract", doc['contract_id']), ("day", stats_day(doc['created_at']))):
+            counter_inc = counters.setdefault(counter, {"total": 0})
+            counter_inc['total'] += 1
+    await increment_stats(inc, counters)
+
+async def record_status_change(previous: Optional[Dict], new_status: str):
+    """Move one request between status counters given its pre-update document"""
+    if not previous or previous.get('status') == new_status:
+        return
+    inc = {f"by_status.{new_status}": 1}
+    if previous.get('status'):
+        inc[f"by_status.{previous['status']}"] = -1
+    counters = {}
+    for status, delta in ((new_status, 1), (previous.get('status'), -1)):
+        if status == "signed":
+            counters[("contract", previous['contract_id'])] = {"signed": delta}
+            counters[("day", stats_day(previous['created_at']))] = {"signed": delta}
+    await increment_stats(inc, counters)
+
+async def compute_stats_snapshot() -> Dict:
+    """Recompute every dashboard counter from the raw collections"""
+    signed = {"$cond": [{"$eq": ["$status", "signed"]}, 1, 0]}
+    pipeline = [
+        {"$facet": {
+            "by_status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ],
+            "by_contract": [
+                {"$group": {"_id": "$contract_id", "total": {"$sum": 1}, "signed": {"$sum": signed}}}
+            ],
+            "by_day": [
+                {"$group": {
+                    "_id": {"$cond": [
+                        {"$eq": [{"$type": "$created_at"}, "date"]},
+                        {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                        {"$substr": ["$created_at", 0, 10]}
+                    ]},
+                    "total": {"$sum": 1},
+                    "signed": {"$sum": signed}
+                }}
+            ]
+        }}
+    ]
+    facets, total_contracts = await asyncio.gather(
+        db.signature_requests.aggregate(pipeline).to_list(1),
+        db.contracts.count_documents({})
+    )
+    facets = facets[0] if facets else {"by_status": [], "by_contract": [], "by_day": []}
+    return {
+        "_id": STATS_ID,
+        "total_contracts": total_contracts,
+        "total_requests": sum(row['count'] for row in facets['by_status']),
+        "by_status": {row['_id']: row['count'] for row in facets['by_status'] if row['_id']},
+        "by_contract": {
+            row['_id']: {"total": row['total'], "signed": row['signed']}
+            for row in facets['by_contract'] if row['_id']
+        },
+        "by_day": {
+            row['_id']: {"total": row['total'], "signed": row['signed']}
+            for row in facets['by_day'] if row['_id']
+        }
+    }
+
+def flatten_counters(doc: Dict, prefix: str = "") -> Dict:
+    flat = {}
+    for key, value in doc.items():
+        if key == "_id":
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten_counters(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+async def read_stats_counters() -> Dict[str, Dict]:
+    return {doc['_id']: doc async for doc in db.stats_counters.find({})}
+
+async def reconcile_stats_counters(snapshot: Dict, before: Dict[str, Dict], current: Dict[str, Dict]) -> Dict:
+    """Bring stats_counters in line with a snapshot, one conditional write per key.
+
+    A key whose document changed while the snapshot was computed is left for
+    the next run, since the snapshot may or may not include that change.
+    """
+    expected = {}
+    for kind, field in STATS_COUNTER_FIELDS.items():
+        for key, counts in snapshot[field].items():
+            expected[stats_counter_id(kind, key)] = {"kind": kind, "key": key, **counts}
+    
+    drift = {}
+    for counter_id in set(expected) | set(current):
+        stored = current.get(counter_id)
+        if stored != before.get(counter_id):
+            continue
+        target = expected.get(counter_id) or {**stored, "total": 0, "signed": 0}
+        diff = {
+            name: target[name] - (stored or {}).get(name, 0)
+            for name in ("total", "signed")
+            if target[name] != (stored or {}).get(name, 0)
+        }
+        if stored is None:
+            try:
+                await db.stats_counters.insert_one({"_id": counter_id, **target})
+            except DuplicateKeyError:
+                continue
+        elif counter_id not in expected:
+            # No requests left for this key: drop the document
+            condition = {name: stored.get(name) for name in ("total", "signed")}
+            if not (await db.stats_counters.delete_one({"_id": counter_id, **condition})).deleted_count:
+                continue
+        elif diff:
+            condition = {name: stored.get(name) for name in diff}
+            if not (await db.stats_counters.update_one({"_id": counter_id, **condition}, {"$inc": diff})).matched_count:
+                continue
+        for name, delta in diff.items():
+            stored_value = (stored or {}).get(name, 0)
+            drift[f"{STATS_COUNTER_FIELDS[target['kind']]}.{target['key']}.{name}"] = {
+                "stored": stored_value, "actual": stored_value + delta
+            }
+    return drift
+
+async def reconcile_stats(attempts: int = 5) -> Dict:
+    """Correct drifted dashboard counters from the raw collections and report drift.
+
+    Only the drifted fields are changed, with an $inc conditioned on the
+    values read, so increments made by live traffic while the aggregation
+    runs are never overwritten; if one lands on a drifted field of the stats
+    document the pass is retried, and a per-key counter is left for the next
+    run.
+    """
+    # Older versions kept the per-contract and per-day maps in the stats document
+    await db.stats.update_one(
+        {"_id": STATS_ID, "$or": [{field: {"$exists": True}} for field in STATS_COUNTER_FIELDS.values()]},
+        {"$unset": {field: "" for field in STATS_COUNTER_FIELDS.values()}}
+    )
+    
+    counter_drift = {}
+    for _ in range(attempts):
+        before, counters_before = await asyncio.gather(db.stats.find_one({"_id": STATS_ID}), read_stats_counters())
+        snapshot = await compute_stats_snapshot()
+        current, counters_current = await asyncio.gather(db.stats.find_one({"_id": STATS_ID}), read_stats_counters())
+        counter_drift.update(await reconcile_stats_counters(snapshot, counters_before, counters_current))
+        if counter_drift:
+            dashboard_stats_cache.invalidate()
+        
+        totals = {key: value for key, value in snapshot.items() if key not in STATS_COUNTER_FIELDS.values()}
+        if current != before:
+            # Counters moved while aggregating: the snapshot may or may not include that change
+            continue
+        if current is None:
+            try:
+                await db.stats.insert_one(totals)
+            except DuplicateKeyError:
+                continue
+            dashboard_stats_cache.invalidate()
+            return {"drift": counter_drift}
+        
+        expected, actual = flatten_counters(totals), flatten_counters(current)
+        drift = {
+            key: {"stored": actual.get(key, 0), "actual": expected.get(key, 0)}
+            for key in set(expected) | set(actual)
+            if actual.get(key, 0) != expected.get(key, 0)
+        }
+        if drift:
+            result = await db.stats.update_one(
+                {"_id": STATS_ID, **{key: actual.get(key) for key in drift}},
+                {"$inc": {key: values['actual'] - values['stored'] for key, values in drift.items()}}
+            )
+            if not result.matched_count:
+                continue
+            dashboard_stats_cache.invalidate()
+        drift.update(counter_drift)
+        if drift:
+            logger.warning(f"Dashboard counters drifted on {len(drift)} fields; reconciled")
+        return {"drift": drift}
+    logger.warning("Dashboard counters kept changing during reconciliation; will retry on the next run")
+    return {"drift": counter_drift, "skipped": True}
+
+async def stats_reconcile_worker():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_SECONDS)
+        try:
+            await reconcile_stats()
+        except Exception as e:
+            logger.error(f"Error reconciling dashboard counters: {str(e)}")
+
+
+# Audit Chain
+# Every audit entry stores seq (position in its request's chain), prev_hash
+# (entry_hash of the previous entry of the same request) and entry_hash.
+# Checkpoints commit to the entries written since the previous checkpoint
+# with an RFC 6962 Merkle tree whose leaves are sorted by entry_hash.
+AUDIT_GENESIS_HASH = "0" * 64
+AUDIT_CHAIN_FIELDS = ("seq", "prev_hash", "entry_hash", "checkpoint")
+AUDIT_HASH_FIELDS = ("id", "request_id", "action", "details", "timestamp", "ip_address", "user_agent", "seq", "prev_hash")
+# Every chained entry is written with all of these keys (null when empty)
+AUDIT_REQUIRED_FIELDS = AUDIT_HASH_FIELDS + ("entry_hash",)
+
+def audit_entry_hash(entry: Dict) -> str:
+    """SHA-256 over the canonical JSON of an entry's chained fields"""
+    payload = {field: entry.get(field) for field in AUDIT_HASH_FIELDS}
+    if payload['timestamp'] is not None:
+        payload['timestamp'] = as_utc(payload['timestamp']).isoformat(timespec="milliseconds")
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+async def chain_audit_entries(docs: List[Dict]) -> List[Dict]:
+    """Return copies of docs linked onto the current head of each request's chain.
+
+    docs must be grouped by request_id with each group in write order. The
+    unique (request_id, seq) index rejects a batch built on a stale head.
+    """
+    request_ids = list({doc['request_id'] for doc in docs})
+    heads = {}
+    async for head in db.audit_logs.aggregate([
+        {"$match": {"request_id": {"$in": request_ids}, "seq": {"$exists": True, "$ne": None}}},
+        {"$sort": {"request_id": -1, "seq": -1}},
+        {"$group": {"_id": "$request_id", "seq": {"$first": "$seq"}, "entry_hash": {"$first": "$entry_hash"}}}
+    ]):
+        heads[head['_id']] = (head['seq'], head['entry_hash'])
+    
+    chained = []
+    for doc in docs:
+        seq, prev_hash = heads.get(doc['request_id'], (0, AUDIT_GENESIS_HASH))
+        entry = {**doc, "seq": seq + 1, "prev_hash": prev_hash}
+        entry['entry_hash'] = audit_entry_hash(entry)
+        heads[doc['request_id']] = (entry['seq'], entry['entry_hash'])
+        chained.append(entry)
+    return chained
+
+def merkle_leaf(entry_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(entry_hash)).digest()
+
+def merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+class MerkleAccumulator:
+    """Streaming RFC 6962 tree root: keeps one hash per perfect subtree"""
+    
+    def __init__(self):
+        self.stack = []
+        self.size = 0
+    
+    def add(self, node_hash: bytes):
+        size, node = 1, node_hash
+        while self.stack and self.stack[-1][0] == size:
+            left_size, left = self.stack.pop()
+            size, node = left_size + size, merkle_node(left, node)
+        self.stack.append((size, node))
+        self.size += 1
+    
+    def root(self) -> bytes:
+        if not self.stack:
+            return hashlib.sha256(b"").digest()
+        root = self.stack[-1][1]
+        for _, node in reversed(self.stack[:-1]):
+            root = merkle_node(node, root)
+        return root
+
+def merkle_root(nodes: List[bytes]) -> bytes:
+    accumulator = MerkleAccumulator()
+    for node in nodes:
+        accumulator.add(node)
+    return accumulator.root()
+
+def merkle_path(index: int, nodes: List[bytes]) -> List[bytes]:
+    """RFC 6962 audit path for nodes[index], ordered from the leaf upwards"""
+    if len(nodes) <= 1:
+        return []
+    split = 1 << ((len(nodes) - 1).bit_length() - 1)
+    if index < split:
+        return merkle_path(index, nodes[:split]) + [merkle_root(nodes[split:])]
+    return merkle_path(index - split, nodes[split:]) + [merkle_root(nodes[:split])]
+
+def verify_merkle_path(entry_hash: str, index: int, size: int, path: List[str], root: str) -> bool:
+    """Check an inclusion proof (RFC 9162, section 2.1.3.2)"""
+    if index >= size:
+        return False
+    fn, sn = index, size - 1
+    node = merkle_leaf(entry_hash)
+    for sibling in map(bytes.fromhex, path):
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            node = merkle_node(sibling, node)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = merkle_node(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node.hex() == root
+
+def checkpoint_hash(seq: int, leaf_count: int, root: str, prev_hash: str) -> str:
+    return hashlib.sha256(f"{seq}:{leaf_count}:{root}:{prev_hash}".encode()).hexdigest()
+
+async def build_checkpoint_tree(seq: int, on_modified=None) -> Dict:
+    """Stream the sorted leaves of a checkpoint once and return its root and
+    the root and first entry_hash of every AUDIT_CHECKPOINT_BLOCK leaves.
+
+    With on_modified, full entries are read and every leaf whose content no
+    longer hashes to its entry_hash is passed to it.
+    """
+    blocks = []
+    leaf_count = 0
+    tree = MerkleAccumulator()
+    block = MerkleAccumulator()
+    first = None
+    projection = {"_id": 0} if on_modified else {"_id": 0, "entry_hash": 1}
+    cursor = db.audit_logs.find(
+        {"checkpoint": seq}, projection
+    ).sort("entry_hash", ASCENDING).batch_size(EXPORT_MAX_BATCH_SIZE)
+    async for doc in cursor:
+        entry_hash = doc.get('entry_hash')
+        if on_modified and (entry_hash is None or audit_entry_hash(doc) != entry_hash):
+            on_modified(doc)
+        if entry_hash is None:
+            continue
+        if first is None:
+            first = entry_hash
+        block.add(merkle_leaf(entry_hash))
+        leaf_count += 1
+        if block.size == AUDIT_CHECKPOINT_BLOCK:
+            blocks.append({"first": first, "root": block.root().hex()})
+            tree.add(block.root())
+            block, first = MerkleAccumulator(), None
+    if block.size:
+        blocks.append({"first": first, "root": block.root().hex()})
+        tree.add(block.root())
+    return {"root": tree.root().hex(), "leaf_count": leaf_count, "blocks": blocks}
+
+async def create_audit_checkpoint() -> Optional[Dict]:
+    """Commit every chained entry not yet in a checkpoint to a new checkpoint.
+
+    A checkpoint is claimed by inserting it as "building" (unique seq), so
+    only one replica builds it; a build left behind by a crashed process is
+    taken over after AUDIT_CHECKPOINT_STALE_SECONDS.
+    """
+    now = datetime.now(timezone.utc)
+    last = await db.audit_checkpoints.find_one({}, {"_id": 0}, sort=[("seq", DESCENDING)])
+    if last and last['status'] == "building":
+        if as_utc(last['created_at']) > now - timedelta(seconds=AUDIT_CHECKPOINT_STALE_SECONDS):
+            return None
+        claimed = await db.audit_checkpoints.update_one(
+            {"seq": last['seq'], "status": "building", "created_at": last['created_at']},
+            {"$set": {"created_at": now}}
+        )
+        if not claimed.modified_count:
+            return None
+        seq = last['seq']
+        previous = await db.audit_checkpoints.find_one({"seq": seq - 1}, {"_id": 0})
+    else:
+        seq = last['seq'] + 1 if last else 1
+        previous = last
+        try:
+            await db.audit_checkpoints.insert_one({"seq": seq, "status": "building", "created_at": now})
+        except DuplicateKeyError:
+            return None
+    
+    marked = await db.audit_logs.count_documents({"checkpoint": seq})
+    while marked < AUDIT_CHECKPOINT_MAX_LEAVES:
+        limit = min(EXPORT_BATCH_SIZE, AUDIT_CHECKPOINT_MAX_LEAVES - marked)
+        ids = [doc['_id'] async for doc in db.audit_logs.find(
+            {"checkpoint": None, "entry_hash": {"$ne": None}}, {"_id": 1}
+        ).limit(limit)]
+        if not ids:
+            break
+        result = await db.audit_logs.update_many(
+            {"_id": {"$in": ids}, "checkpoint": None},
+            {"$set": {"checkpoint": seq}}
+        )
+        marked += result.modified_count
+    
+    if not marked:
+        await db.audit_checkpoints.delete_one({"seq": seq, "status": "building"})
+        return None
+    
+    tree = await build_checkpoint_tree(seq)
+    prev_hash = previous['checkpoint_hash'] if previous else AUDIT_GENESIS_HASH
+    checkpoint = {
+        "seq": seq,
+        "status": "complete",
+        "root": tree['root'],
+        "leaf_count": tree['leaf_count'],
+        "blocks": tree['blocks'],
+        "prev_checkpoint_hash": prev_hash,
+        "checkpoint_hash": checkpoint_hash(seq, tree['leaf_count'], tree['root'], prev_hash),
+        "created_at": now,
+        "completed_at": datetime.now(timezone.utc)
+    }
+    await db.audit_checkpoints.replace_one({"seq": seq}, checkpoint)
+    checkpoint.pop("blocks")
+    return checkpoint
+
+async def audit_checkpoint_worker():
+    while True:
+        await asyncio.sleep(AUDIT_CHECKPOINT_SECONDS)
+        try:
+            await audit_writer.flush()
+            while await create_audit_checkpoint():
+                pass
+        except Exception as e:
+            logger.error(f"Error creating audit checkpoint: {str(e)}")
+
+async def verify_audit_log(request_id: Optional[str] = None, max_problems: int = 100) -> Dict:
+    """Verify hash chains (and, for the full log, checkpoints) in one streaming pass.
+
+    Chained entries are read ordered by (request_id, seq) through the
+    request_id_seq_unique index, so memory use does not depend on the size of
+    the log. Only entries written before chaining (no chain fields at all)
+    count as unchained; an entry that lost its seq but kept other chain
+    fields has been tampered with, as has a chained entry missing any of
+    AUDIT_REQUIRED_FIELDS; both are reported as problems, never raised.
+    """
+    report = {"entries": 0, "requests": 0, "unchained": 0, "checkpoints": 0, "problems": []}
+    
+    def problem(kind: str, **details):
+        if len(report['problems']) < max_problems:
+            report['problems'].append({"type": kind, **details})
+        report['valid'] = False
+    
+    report['valid'] = True
+    base_query = {"request_id": request_id} if request_id else {}
+    unchained_query = {**base_query, **{field: None for field in AUDIT_CHAIN_FIELDS}}
+    report['unchained'] = await db.audit_logs.count_documents(unchained_query)
+    report['entries'] += report['unchained']
+    
+    detached_query = {
+        **base_query,
+        "seq": None,
+        "$or": [{field: {"$ne": None}} for field in AUDIT_CHAIN_FIELDS if field != "seq"]
+    }
+    async for entry in db.audit_logs.find(detached_query, {"_id": 0, "id": 1, "request_id": 1}):
+        report['entries'] += 1
+        problem("detached_entry", request_id=entry.get('request_id'), id=entry.get('id'))
+    
+    current, last_seq, last_hash = None, 0, AUDIT_GENESIS_HASH
+    cursor = db.audit_logs.find({**base_query, "seq": {"$exists": True}}, {"_id": 0}).sort(
+        [("request_id", ASCENDING), ("seq", ASCENDING)]
+    ).batch_size(EXPORT_MAX_BATCH_SIZE)
+    async for entry in cursor:
+        if entry['seq'] is None:
+            # Written as null by older versions; counted by the queries above
+            continue
+        report['entries'] += 1
+        if entry.get('request_id') != current:
+            current, last_seq, last_hash = entry.get('request_id'), 0, AUDIT_GENESIS_HASH
+            report['requests'] += 1
+        missing = [field for field in AUDIT_REQUIRED_FIELDS if field not in entry]
+        if missing:
+            problem("missing_fields", request_id=current, seq=entry['seq'], id=entry.get('id'), fields=missing)
+        if entry['seq'] != last_seq + 1:
+            problem("missing_entries", request_id=current, after_seq=last_seq, found_seq=entry['seq'])
+        elif entry.get('prev_hash') != last_hash:
+            problem("broken_link", request_id=current, seq=entry['seq'], id=entry.get('id'))
+        if audit_entry_hash(entry) != entry.get('entry_hash'):
+            problem("modified_entry", request_id=current, seq=entry['seq'], id=entry.get('id'))
+        last_seq, last_hash = entry['seq'], entry.get('entry_hash')
+    
+    if request_id is None:
+        prev_hash = AUDIT_GENESIS_HASH
+        async for checkpoint in db.audit_checkpoints.find(
+            {"status": "complete"}, {"_id": 0, "blocks": 0}
+        ).sort("seq", ASCENDING):
+            report['checkpoints'] += 1
+            tree = await build_checkpoint_tree(
+                checkpoint['seq'],
+                on_modified=lambda entry: problem(
+                    "modified_checkpoint_entry", seq=checkpoint['seq'], request_id=entry.get('request_id'), id=entry.get('id')
+                )
+            )
+            if tree['root'] != checkpoint['root'] or tree['leaf_count'] != checkpoint['leaf_count']:
+                problem("checkpoint_mismatch", seq=checkpoint['seq'], leaf_count=tree['leaf_count'])
+            expected = checkpoint_hash(checkpoint['seq'], checkpoint['leaf_count'], checkpoint['root'], prev_hash)
+            if checkpoint['prev_checkpoint_hash'] != prev_hash or checkpoint['checkpoint_hash'] != expected:
+                problem("broken_checkpoint_link", seq=checkpoint['seq'])
+            prev_hash = checkpoint['checkpoint_hash']
+    
+    return report
+
+async def audit_inclusion_proof(entry: Dict) -> Dict:
+    """O(log n) proof that an entry is committed to by its checkpoint's root.
+
+    Reads one block of at most AUDIT_CHECKPOINT_BLOCK leaves; the path above
+    the block comes from the block roots stored with the checkpoint.
+    """
+    checkpoint = await db.audit_checkpoints.find_one(
+        {"seq": entry.get('checkpoint'), "status": "complete"}, {"_id": 0}
+    )
+    if not checkpoint:
+        raise HTTPException(status_code=409, detail="La entrada aún no está incluida en un checkpoint")
+    
+    blocks = checkpoint['blocks']
+    block_index = max(i for i, block in enumerate(blocks) if i == 0 or block['first'] <= entry['entry_hash'])
+    leaves = [doc['entry_hash'] async for doc in db.audit_logs.find(
+        {"checkpoint": checkpoint['seq'], "entry_hash": {"$gte": blocks[block_index]['first']}},
+        {"_id": 0, "entry_hash": 1}
+    ).sort("entry_hash", ASCENDING).limit(AUDIT_CHECKPOINT_BLOCK)]
+    if entry['entry_hash'] not in leaves:
+        raise HTTPException(status_code=409, detail="La entrada no coincide con su checkpoint")
+    
+    position = leaves.index(entry['entry_hash'])
+    path = merkle_path(position, [merkle_leaf(leaf) for leaf in leaves])
+    path += merkle_path(block_index, [bytes.fromhex(block['root']) for block in blocks])
+    path = [node.hex() for node in path]
+    leaf_index = block_index * AUDIT_CHECKPOINT_BLOCK + position
+    
+    return {
+        "entry": entry,
+        "entry_hash": entry['entry_hash'],
+        "computed_hash": audit_entry_hash(entry),
+        "leaf_index": leaf_index,
+        "proof": path,
+        "checkpoint": {
+            "seq": checkpoint['seq'],
+            "root": checkpoint['root'],
+            "leaf_count": checkpoint['leaf_count'],
+            "prev_checkpoint_hash": checkpoint['prev_checkpoint_hash'],
+            "checkpoint_hash": checkpoint['checkpoint_hash']
+        },
+        "valid": audit_entry_hash(entry) == entry['entry_hash'] and verify_merkle_path(
+            entry['entry_hash'], leaf_index, checkpoint['leaf_count'], path, checkpoint['root']
+        )
+    }
+
 
-class SignContractRequest(BaseModel):
-    request_id: str
-    form_data: Dict
-    ip_address: Optional[str] = None
-    user_agent: Optional[str] = None
+# Signature Request Status
+# Allowed transitions; signed, rejected and expired are final
+STATUS_TRANSITIONS = {
+    "pending": {"otp_sent", "rejected", "expired"},
+    "otp_sent": {"otp_sent", "otp_verified", "rejected", "expired"},
+    "otp_verified": {"otp_sent", "signed", "rejected", "expired"},
+    "signed": set(),
+    "rejected": set(),
+    "expired": set(),
+}
 
-class AuditLog(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    request_id: str
-    action: str
-    details: Dict
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    ip_address: Optional[str] = None
-    user_agent: Optional[str] = None
+STATUS_LABELS = {
+    "pending": "pendiente",
+    "otp_sent": "con código enviado",
+    "otp_verified": "verificada",
+    "signed": "firmada",
+    "rejected": "rechazada",
+    "expired": "vencida",
+}
 
-class VerifyIntegrityRequest(BaseModel):
-    file_hash: str
+def status_sources(new_status: str) -> List[str]:
+    """Statuses from which a request may move to new_status"""
+    return [status for status, targets in STATUS_TRANSITIONS.items() if new_status in targets]
 
-class VerifyIntegrityResponse(BaseModel):
-    valid: bool
-    message: str
-    found_in_system: bool
+def require_transition(sig_request: Dict, new_status: str):
+    """Reject with 409 if the request cannot move to new_status from its current status"""
+    status = sig_request.get('status') or "pending"
+    if new_status not in STATUS_TRANSITIONS.get(status, set()):
+        raise HTTPException(
+            status_code=409,
+            detail=f"La solicitud está {STATUS_LABELS.get(status, status)} y no admite esta operación"
+        )
 
+async def transition_status(request_id: str, new_status: str, query: Dict = None, fields: Dict = None) -> Optional[Dict]:
+    """Atomically move a request to new_status if its current status allows it.
 
-# Utility Functions
-def calculate_file_hash(file_path: Path) -> str:
-    """Calculate SHA-256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    Returns the document as it was before the update, or None when the
+    request is missing or its status (or the extra query) no longer matches.
+    """
+    previous = await db.signature_requests.find_one_and_update(
+        {"id": request_id, "status": {"$in": status_sources(new_status)}, **(query or {})},
+        {"$set": {"status": new_status, **(fields or {})}},
+        projection={"_id": 0, "status": 1, "contract_id": 1, "created_at": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous:
+        await record_status_change(previous, new_status)
+    return previous
 
-def generate_otp() -> str:
-    """Generate 6-digit OTP"""
-    return str(secrets.randbelow(1000000)).zfill(6)
+# Database Indexes
+async def ensure_indexes():
+    """Create every index declared in INDEX_SPECS. Safe to run repeatedly."""
+    for collection_name, indexes in INDEX_SPECS.items():
+        for index in indexes:
+            try:
+                await db[collection_name].create_indexes([index])
+            except OperationFailure as e:
+                logger.error(f"Could not create index {index.document['name']} on {collection_name}: {str(e)}")
 
-async def send_email(to_email: str, subject: str, body: str) -> bool:
-    """Send email via SMTP"""
-    try:
-        smtp_host = os.environ.get('SMTP_HOST', 'mail.academiajotuns.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', 465))
-        smtp_user = os.environ.get('SMTP_USER', 'sistema.contratos@academiajotuns.com')
-        smtp_pass = os.environ.get('SMTP_PASS', '')
+async def check_indexes() -> Dict:
+    """Report declared indexes that are missing and existing indexes that have never been used"""
+    report = {}
+    for collection_name, indexes in INDEX_SPECS.items():
+        existing = {}
+        async for index in db[collection_name].list_indexes():
+            existing[index['name']] = list(index['key'].items())
         
-        message = MIMEMultipart('alternative')
-        message['From'] = smtp_user
-        message['To'] = to_email
-        message['Subject'] = subject
+        usage = {}
+        try:
+            async for stat in db[collection_name].aggregate([{"$indexStats": {}}]):
+                usage[stat['name']] = stat['accesses']['ops']
+        except OperationFailure as e:
+            logger.warning(f"Could not read index stats for {collection_name}: {str(e)}")
         
-        html_part = MIMEText(body, 'html')
-        message.attach(html_part)
-        
-        await aiosmtplib.send(
-            message,
-            hostname=smtp_host,
-            port=smtp_port,
-            username=smtp_user,
-            password=smtp_pass,
-            use_tls=True
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
-        return False
+        declared_keys = [list(index.document['key'].items()) for index in indexes]
+        missing = [
+            index.document['name'] for index in indexes
+            if list(index.document['key'].items()) not in existing.values()
+        ]
+        unused = [name for name, ops in usage.items() if ops == 0 and name != "_id_"]
+        undeclared = [
+            name for name, key in existing.items()
+            if name != "_id_" and key not in declared_keys
+        ]
+        report[collection_name] = {
+            "missing": missing,
+            "unused": unused,
+            "undeclared": undeclared
+        }
+    return report
 
-async def send_sms(phone: str, message: str) -> bool:
-    """Send SMS via TextMeBot API"""
-    try:
-        api_key = os.environ.get('TEXTMEBOT_API_KEY', '')
-        url = f"https://api.textmebot.com/send.php?recipient={phone}&apikey={api_key}&text={message}"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                return response.status == 200
-    except Exception as e:
-        logger.error(f"Error sending SMS: {str(e)}")
-        return False
 
-async def log_audit(request_id: str, action: str, details: Dict, ip_address: str = None, user_agent: str = None):
-    """Create audit log entry"""
-    audit = AuditLog(
-        request_id=request_id,
-        action=action,
-        details=details,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
-    doc = audit.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-    await db.audit_logs.insert_one(doc)
+# Timestamp Migration
+# Fields that older versions wrote as ISO-8601 strings
+TIMESTAMP_FIELDS = {
+    "contracts": ["created_at"],
+    "signature_requests": ["created_at", "signed_at"],
+    "audit_logs": ["timestamp"],
+    "otps": ["expiry"],
+    "blobs": ["created_at"],
+    "pdf_schemas": ["created_at"],
+}
+
+async def migrate_timestamps(batch_size: int = 1000, dry_run: bool = False) -> Dict:
+    """Convert string timestamps to BSON dates, one bulk_write per batch.
 
+    Only documents whose field is still a string are selected, so the
+    command can be interrupted and re-run. Each update is conditioned on the
+    original value so concurrent writes are never overwritten.
+    """
+    result = {"dry_run": dry_run}
+    for collection_name, fields in TIMESTAMP_FIELDS.items():
+        collection = db[collection_name]
+        for field in fields:
+            converted = invalid = 0
+            last_id = None
+            while True:
+                query = {field: {"$type": "string"}}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                docs = await collection.find(query, {field: 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+                if not docs:
+                    break
+                last_id = docs[-1]['_id']
+                
+                updates = []
+                for doc in docs:
+                    try:
+                        value = as_utc(datetime.fromisoformat(doc[field]))
+                    except ValueError:
+                        invalid += 1
+                        continue
+                    updates.append(UpdateOne({"_id": doc['_id'], field: doc[field]}, {"$set": {field: value}}))
+                if updates and not dry_run:
+                    await collection.bulk_write(updates, ordered=False)
+                converted += len(updates)
+            result[f"{collection_name}.{field}"] = {"converted": converted, "invalid": invalid}
+    return result
+
+
+# Document Hash Index
+# One entry per stored document (original contract or signed PDF), so any
+# number of hashes can be resolved with a single $in query.
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+def document_hash_entry(kind: str, file_hash: str, contract_id: str, request_id: Optional[str], created_at) -> Dict:
+    return {
+        "hash": file_hash,
+        "kind": kind,
+        "ref_id": request_id if kind == "signed" else contract_id,
+        "contract_id": contract_id,
+        "request_id": request_id,
+        "created_at": created_at
+    }
+
+def document_hash_upsert(entry: Dict) -> tuple:
+    """(filter, update) that inserts the entry once per document"""
+    return {"kind": entry['kind'], "ref_id": entry['ref_id']}, {"$setOnInsert": entry}
+
+async def register_document_hash(kind: str, file_hash: str, contract_id: str, request_id: Optional[str] = None, created_at=None):
+    """Record a stored document in document_hashes (idempotent)"""
+    entry = document_hash_entry(kind, file_hash, contract_id, request_id, created_at or datetime.now(timezone.utc))
+    await db.document_hashes.update_one(*document_hash_upsert(entry), upsert=True)
+
+async def lookup_document_hashes(hashes: List[str]) -> Dict[str, List[Dict]]:
+    """Resolve every hash with one $in query. Returns {hash: [entries]}."""
+    found = {}
+    if not hashes:
+        return found
+    async for doc in db.document_hashes.find({"hash": {"$in": hashes}}, {"_id": 0, "ref_id": 0}):
+        found.setdefault(doc['hash'], []).append(doc)
+    return found
+
+async def backfill_document_hashes(batch_size: int = 1000, dry_run: bool = False) -> Dict:
+    """Index contracts and signed requests stored before document_hashes existed.
+
+    Upserts are keyed by (kind, ref_id), so the command can be re-run safely.
+    """
+    result = {"dry_run": dry_run}
+    sources = [
+        ("contract", db.contracts, {"file_hash": {"$exists": True}},
+         lambda doc: document_hash_entry("contract", doc['file_hash'], doc['id'], None, doc.get('created_at'))),
+        ("signed", db.signature_requests, {"signed_file_hash": {"$ne": None}},
+         lambda doc: document_hash_entry("signed", doc['signed_file_hash'], doc['contract_id'], doc['id'], doc.get('signed_at'))),
+    ]
+    for kind, collection, base_query, to_entry in sources:
+        scanned = upserted = 0
+        last_id = None
+        while True:
+            query = dict(base_query)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            docs = await collection.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            last_id = docs[-1]['_id']
+            scanned += len(docs)
+            if not dry_run:
+                written = await db.document_hashes.bulk_write(
+                    [UpdateOne(*document_hash_upsert(to_entry(doc)), upsert=True) for doc in docs], ordered=False
+                )
+                upserted += written.upserted_count
+        result[kind] = {"scanned": scanned, "upserted": upserted}
+    return result
 
 # API Endpoints
 @api_router.get("/")
@@ -222,91 +3203,120 @@ async def admin_login(request: AdminLoginRequest):
 
 # Contract Management
 @api_router.get("/contracts", response_model=List[Contract])
-async def get_contracts():
-    contracts = await db.contracts.find({}, {"_id": 0}).to_list(1000)
-    for contract in contracts:
-        if isinstance(contract.get('created_at'), str):
-            contract['created_at'] = datetime.fromisoformat(contract['created_at'])
-    return contracts
+async def get_contracts(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    query = build_date_range_query("created_at", date_from, date_to)
+    return await fetch_page(db.contracts, query, limit, cursor, response)
 
 @api_router.post("/contracts", response_model=Contract)
 async def create_contract(name: str = Form(...), description: str = Form(None), file: UploadFile = File(...)):
-    # Save uploaded file
-    file_id = str(uuid.uuid4())
-    file_path = CONTRACTS_DIR / f"{file_id}_{file.filename}"
+    # Stream uploaded file to disk, hashing it on the way, then store it by hash
+    tmp_path, file_hash, size = await save_upload(file)
     
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
-    
-    # Calculate hash
-    file_hash = calculate_file_hash(file_path)
-    
-    # Extract PDF fields (simplified)
-    fields = []
+    # Extract the PDF form schema (reused if this PDF was uploaded before)
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-        if '/AcroForm' in pdf_reader.trailer['/Root']:
-            form = pdf_reader.trailer['/Root']['/AcroForm']
-            if '/Fields' in form:
-                for field in form['/Fields']:
-                    field_obj = field.get_object()
-                    if '/T' in field_obj:
-                        fields.append({
-                            "name": str(field_obj['/T']),
-                            "type": "text"
-                        })
-    except Exception as e:
-        logger.warning(f"Could not extract PDF fields: {str(e)}")
+        fields = await get_pdf_schema(file_hash, tmp_path)
+    except BaseException:
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise
+    file_path = await store_blob(tmp_path, file_hash, size)
     
     contract = Contract(
         name=name,
         description=description,
-        file_path=str(file_path),
+        file_path=file_path,
+        file_name=Path(file.filename).name,
         file_hash=file_hash,
         fields=fields
     )
     
     doc = contract.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.contracts.insert_one(doc)
+    await register_document_hash("contract", file_hash, contract.id, created_at=contract.created_at)
+    contract_cache.invalidate(contract.id)
+    await increment_stats({"total_contracts": 1})
     
     return contract
 
 @api_router.get("/contracts/{contract_id}")
 async def get_contract(contract_id: str):
-    contract = await db.contracts.find_one({"id": contract_id}, {"_id": 0})
+    contract = await get_cached_contract(contract_id)
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
     return contract
 
 @api_router.get("/contracts/{contract_id}/download")
-async def download_contract(contract_id: str):
-    contract = await db.contracts.find_one({"id": contract_id}, {"_id": 0})
+async def download_contract(contract_id: str, request: Request):
+    contract = await get_cached_contract(contract_id)
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
     
-    file_path = Path(contract['file_path'])
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-    
-    return FileResponse(file_path, filename=file_path.name)
+    filename = contract.file_name or Path(contract.file_path).name
+    return await file_download_response(request, contract.file_hash, contract.file_path, filename)
 
 # Signature Request Management
+def build_signature_request_query(
+    status: Optional[str],
+    contract_id: Optional[str],
+    signer_email: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime]
+) -> Dict:
+    query = build_date_range_query("created_at", date_from, date_to)
+    if status:
+        query["status"] = status
+    if contract_id:
+        query["contract_id"] = contract_id
+    if signer_email:
+        query["signer_email"] = signer_email
+    return query
+
 @api_router.get("/signature-requests", response_model=List[SignatureRequest])
-async def get_signature_requests():
-    requests = await db.signature_requests.find({}, {"_id": 0}).to_list(1000)
-    for req in requests:
-        if isinstance(req.get('created_at'), str):
-            req['created_at'] = datetime.fromisoformat(req['created_at'])
-        if req.get('signed_at') and isinstance(req['signed_at'], str):
-            req['signed_at'] = datetime.fromisoformat(req['signed_at'])
-    return requests
+async def get_signature_requests(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    contract_id: Optional[str] = None,
+    signer_email: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    query = build_signature_request_query(status, contract_id, signer_email, date_from, date_to)
+    return await fetch_page(db.signature_requests, query, limit, cursor, response)
+
+# The token is a signing credential and is never exported
+SIGNATURE_REQUEST_EXPORT_COLUMNS = [
+    "id", "contract_id", "signer_name", "signer_email", "signer_phone",
+    "status", "created_at", "signed_at", "signed_file_hash"
+]
+
+@api_router.get("/signature-requests/export")
+async def export_signature_requests(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=EXPORT_MAX_BATCH_SIZE),
+    status: Optional[str] = None,
+    contract_id: Optional[str] = None,
+    signer_email: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    query = build_signature_request_query(status, contract_id, signer_email, date_from, date_to)
+    cursor = db.signature_requests.find(query, {"_id": 0}).sort(
+        [("created_at", ASCENDING), ("id", ASCENDING)]
+    ).batch_size(batch_size)
+    return export_response(cursor, SIGNATURE_REQUEST_EXPORT_COLUMNS, "solicitudes_firma", format, gzip)
 
 @api_router.post("/signature-requests", response_model=SignatureRequest)
 async def create_signature_request(request: SignatureRequestCreate):
     # Verify contract exists
-    contract = await db.contracts.find_one({"id": request.contract_id}, {"_id": 0})
+    contract = await get_cached_contract(request.contract_id)
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
     
@@ -318,8 +3328,8 @@ async def create_signature_request(request: SignatureRequestCreate):
     )
     
     doc = sig_request.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.signature_requests.insert_one(doc)
+    await record_requests_created([doc])
     
     # Log audit
     await log_audit(
@@ -333,6 +3343,134 @@ async def create_signature_request(request: SignatureRequestCreate):
     
     return sig_request
 
+def invitation_email_body(signer_name: str, contract_name: str, token: str) -> str:
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; padding: 20px;">
+        <h2 style="color: #002D54;">ACADEMIA JOTUNS - Solicitud de Firma</h2>
+        <p>Estimado/a {signer_name},</p>
+        <p>Ha sido invitado/a a firmar el contrato <strong>{contract_name}</strong>.</p>
+        <p><a href="{FRONTEND_URL}/sign/{token}">Haga clic aquí para revisar y firmar el contrato</a></p>
+        <br>
+        <p style="color: #666; font-size: 12px;">Academia Jotuns Club SAS</p>
+    </body>
+    </html>
+    """
+
+async def create_signature_requests_bulk(bulk: BulkSignatureRequestCreate) -> BulkSignatureRequestResponse:
+    """Validate all signers, then create requests, audit entries and invitations with insert_many"""
+    if len(bulk.signers) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ROWS} firmantes por solicitud")
+    if bulk.send_invitations and not FRONTEND_URL:
+        raise HTTPException(status_code=400, detail="FRONTEND_URL no configurado para enviar invitaciones")
+    
+    contract = await get_cached_contract(bulk.contract_id)
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contrato no encontrado")
+    
+    results = []
+    sig_requests = []
+    for row, signer in enumerate(bulk.signers, start=1):
+        try:
+            data = BulkSigner.model_validate(signer)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            email = signer.get('signer_email') if isinstance(signer, dict) else None
+            results.append(BulkRowResult(
+                row=row,
+                success=False,
+                signer_email=str(email) if email is not None else None,
+                error=error
+            ))
+            continue
+        sig_request = SignatureRequest(
+            contract_id=bulk.contract_id,
+            signer_name=data.signer_name,
+            signer_email=data.signer_email,
+            signer_phone=data.signer_phone or None
+        )
+        sig_requests.append(sig_request)
+        results.append(BulkRowResult(row=row, success=True, request_id=sig_request.id, signer_email=sig_request.signer_email))
+    
+    if sig_requests:
+        docs = [sig_request.model_dump() for sig_request in sig_requests]
+        await db.signature_requests.insert_many(docs, ordered=False)
+        await record_requests_created(docs)
+        
+        await db.audit_logs.insert_many(await chain_audit_entries([
+            build_audit_doc(
+                request_id=sig_request.id,
+                action="signature_request_created",
+                details={
+                    "contract_id": bulk.contract_id,
+                    "signer_email": sig_request.signer_email,
+                    "bulk": True
+                }
+            )
+            for sig_request in sig_requests
+        ]), ordered=False)
+    
+    notifications = []
+    if bulk.send_invitations:
+        for sig_request in sig_requests:
+            if bulk.send_via_email:
+                notifications.append(build_notification(
+                    channel="email",
+                    to=sig_request.signer_email,
+                    subject="Solicitud de Firma de Contrato - Academia Jotuns",
+                    body=invitation_email_body(sig_request.signer_name, contract.name, sig_request.token),
+                    request_id=sig_request.id
+                ))
+            if bulk.send_via_sms and sig_request.signer_phone:
+                notifications.append(build_notification(
+                    channel="sms",
+                    to=sig_request.signer_phone,
+                    body=f"JOTUNS: Tiene un contrato pendiente de firma: {FRONTEND_URL}/sign/{sig_request.token}",
+                    request_id=sig_request.id
+                ))
+    invitations_queued = await enqueue_notifications(notifications)
+    
+    return BulkSignatureRequestResponse(
+        contract_id=bulk.contract_id,
+        created=len(sig_requests),
+        failed=len(results) - len(sig_requests),
+        invitations_queued=invitations_queued,
+        results=results
+    )
+
+@api_router.post("/signature-requests/bulk", response_model=BulkSignatureRequestResponse)
+async def create_signature_requests_bulk_json(request: BulkSignatureRequestCreate):
+    return await create_signature_requests_bulk(request)
+
+@api_router.post("/signature-requests/bulk/csv", response_model=BulkSignatureRequestResponse)
+async def create_signature_requests_bulk_csv(
+    contract_id: str = Form(...),
+    send_invitations: bool = Form(False),
+    send_via_email: bool = Form(True),
+    send_via_sms: bool = Form(False),
+    file: UploadFile = File(...)
+):
+    # CSV columns: signer_name, signer_email, signer_phone (optional)
+    content = await file.read(MAX_UPLOAD_SIZE + 1)
+    if len(content) > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Archivo CSV demasiado grande")
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode('utf-8-sig')))
+        signers = [
+            {key.strip(): (value or "").strip() for key, value in row.items() if key}
+            for row in reader
+        ]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"CSV inválido: {str(e)}")
+    
+    return await create_signature_requests_bulk(BulkSignatureRequestCreate(
+        contract_id=contract_id,
+        signers=signers,
+        send_invitations=send_invitations,
+        send_via_email=send_via_email,
+        send_via_sms=send_via_sms
+    ))
+
 @api_router.get("/signature-requests/{request_id}")
 async def get_signature_request(request_id: str):
     sig_request = await db.signature_requests.find_one({"id": request_id}, {"_id": 0})
@@ -347,26 +3485,127 @@ async def get_signature_request_by_token(token: str):
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
     return sig_request
 
+@api_router.get("/signature-requests/{request_id}/download-signed")
+async def download_signed_contract(request_id: str, request: Request):
+    sig_request = await db.signature_requests.find_one({"id": request_id}, {"_id": 0})
+    if not sig_request:
+        raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+    if not sig_request.get('signed_file_path'):
+        raise HTTPException(status_code=404, detail="La solicitud aún no ha sido firmada")
+    
+    return await file_download_response(
+        request,
+        sig_request['signed_file_hash'],
+        sig_request['signed_file_path'],
+        f"contrato_firmado_{request_id}.pdf"
+    )
+
 # OTP Management
+def client_ip(http_request: Request) -> str:
+    """Client address for rate limiting.
+
+    Only the X-Forwarded-For entries appended by our own TRUSTED_PROXY_HOPS
+    proxies are trusted; anything to their left comes from the client and
+    may be forged.
+    """
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [entry.strip() for entry in http_request.headers.get("x-forwarded-for", "").split(",")]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS and forwarded[-TRUSTED_PROXY_HOPS]:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return http_request.client.host if http_request.client else "unknown"
+
+async def enforce_rate_limits(action: str, limits: List[tuple]):
+    """Take a token from each (key, burst, per_minute) bucket in order.
+
+    Raises 429 with Retry-After at the first empty bucket, so a request
+    rejected by the per-IP limit does not spend the per-request token.
+    """
+    for key, burst, per_minute in limits:
+        wait = await rate_limiter.acquire(f"{action}:{key}", burst, per_minute / 60)
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Demasiadas solicitudes. Intente de nuevo más tarde.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+def check_otp_lockout(sig_request: Dict):
+    """Reject with 429 while a request is locked after too many failed codes"""
+    locked_until = sig_request.get('otp_locked_until')
+    if not locked_until:
+        return
+    remaining = (as_utc(locked_until) - datetime.now(timezone.utc)).total_seconds()
+    if remaining > 0:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Demasiados intentos fallidos. Intente de nuevo en {math.ceil(remaining / 60)} minutos.",
+            headers={"Retry-After": str(math.ceil(remaining))}
+        )
+
+async def record_failed_verification(request_id: str):
+    """Count a failed code; after OTP_MAX_FAILED_ATTEMPTS lock the request and
+    discard its outstanding codes so guessing cannot continue.
+    """
+    doc = await db.signature_requests.find_one_and_update(
+        {"id": request_id},
+        {"$inc": {"otp_failed_attempts": 1}},
+        projection={"_id": 0, "otp_failed_attempts": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc or doc['otp_failed_attempts'] < OTP_MAX_FAILED_ATTEMPTS:
+        return
+    
+    locked_until = datetime.now(timezone.utc) + timedelta(seconds=OTP_LOCKOUT_SECONDS)
+    locked = await db.signature_requests.update_one(
+        {"id": request_id, "otp_failed_attempts": {"$gte": OTP_MAX_FAILED_ATTEMPTS}},
+        {"$set": {"otp_failed_attempts": 0, "otp_locked_until": locked_until}}
+    )
+    if locked.modified_count:
+        await db.otps.delete_many({"request_id": request_id, "used": False})
+        await log_audit(
+            request_id=request_id,
+            action="otp_locked",
+            details={"locked_until": locked_until.isoformat()}
+        )
+
 @api_router.post("/signature-requests/send-otp")
-async def send_otp(request: OTPSendRequest):
+async def send_otp(request: OTPSendRequest, http_request: Request):
+    ip = client_ip(http_request)
+    await enforce_rate_limits("otp_send", [
+        (ip, OTP_SEND_IP_BURST, OTP_SEND_IP_PER_MINUTE),
+        (request.request_id, OTP_SEND_BURST, OTP_SEND_PER_MINUTE)
+    ])
+    
     sig_request = await db.signature_requests.find_one({"id": request.request_id}, {"_id": 0})
     if not sig_request:
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+    check_otp_lockout(sig_request)
+    require_transition(sig_request, "otp_sent")
+    
+    if not await transition_status(request.request_id, "otp_sent"):
+        raise HTTPException(status_code=409, detail="El estado de la solicitud cambió, intente de nuevo")
     
     # Generate OTP
     otp = generate_otp()
-    expiry = datetime.now(timezone.utc) + timedelta(minutes=10)
+    issued_at = datetime.now(timezone.utc)
+    expiry = issued_at + timedelta(minutes=10)
     
-    # Store OTP
+    # Store OTP and invalidate the ones issued before it; expired codes are
+    # removed by the TTL index on expiry
     otp_doc = {
         "id": str(uuid.uuid4()),
         "request_id": request.request_id,
         "otp": otp,
-        "expiry": expiry.isoformat(),
+        "issued_at": issued_at,
+        "expiry": expiry,
         "used": False
     }
     await db.otps.insert_one(otp_doc)
+    await db.otps.delete_many({
+        "request_id": request.request_id,
+        "used": False,
+        "$or": [{"issued_at": {"$lt": issued_at}}, {"issued_at": {"$exists": False}}]
+    })
     
     # Send OTP via email
     email_body = f"""
@@ -384,71 +3623,71 @@ async def send_otp(request: OTPSendRequest):
     </html>
     """
     
-    email_sent = await send_email(
-        to_email=sig_request['signer_email'],
+    email_queued = await enqueue_notification(
+        channel="email",
+        to=sig_request['signer_email'],
         subject="Código de Verificación - Firma de Contrato",
-        body=email_body
+        body=email_body,
+        request_id=request.request_id
     )
     
     # Send OTP via SMS if phone provided
-    sms_sent = False
+    sms_queued = None
     if sig_request.get('signer_phone'):
         sms_message = f"JOTUNS: Su código de verificación es: {otp}. Válido por 10 minutos."
-        sms_sent = await send_sms(sig_request['signer_phone'], sms_message)
-    
-    # Update request status
-    await db.signature_requests.update_one(
-        {"id": request.request_id},
-        {"$set": {"status": "otp_sent"}}
-    )
+        sms_queued = await enqueue_notification(
+            channel="sms",
+            to=sig_request['signer_phone'],
+            body=sms_message,
+            request_id=request.request_id
+        )
     
     # Log audit
     await log_audit(
         request_id=request.request_id,
         action="otp_sent",
         details={
-            "email_sent": email_sent,
-            "sms_sent": sms_sent
+            "email_notification_id": email_queued,
+            "sms_notification_id": sms_queued
         }
     )
     
     return {"success": True, "message": "OTP enviado exitosamente"}
 
-@api_router.post("/signature-requests/verify-otp", response_model=OTPVerifyResponse)
-async def verify_otp(request: OTPVerifyRequest):
-    # Find OTP
-    otp_doc = await db.otps.find_one(
+async def check_otp(request: OTPVerifyRequest) -> OTPVerifyResponse:
+    """Consume a code if it is valid; rate limits and lockout are the caller's job"""
+    # Check and consume the code in one atomic operation so that concurrent
+    # requests with the same code cannot both succeed
+    now = datetime.now(timezone.utc)
+    otp_doc = await db.otps.find_one_and_update(
         {
             "request_id": request.request_id,
             "otp": request.otp,
-            "used": False
+            "used": False,
+            "expiry": {"$gt": now}
         },
-        {"_id": 0}
+        {"$set": {"used": True, "used_at": now}},
+        projection={"_id": 0, "id": 1}
     )
     
     if not otp_doc:
-        await log_audit(
-            request_id=request.request_id,
-            action="otp_verification_failed",
-            details={"reason": "invalid_otp"}
+        # Only to report why verification failed; nothing is modified here
+        existing = await db.otps.find_one(
+            {"request_id": request.request_id, "otp": request.otp},
+            {"_id": 0, "used": 1}
         )
-        return OTPVerifyResponse(success=False, message="Código OTP inválido")
-    
-    # Check expiry
-    expiry = datetime.fromisoformat(otp_doc['expiry'])
-    if datetime.now(timezone.utc) > expiry:
+        if existing and not existing.get('used'):
+            reason, message = "expired_otp", "Código OTP expirado"
+        elif existing:
+            reason, message = "used_otp", "Código OTP ya utilizado"
+        else:
+            reason, message = "invalid_otp", "Código OTP inválido"
         await log_audit(
             request_id=request.request_id,
             action="otp_verification_failed",
-            details={"reason": "expired_otp"}
+            details={"reason": reason}
         )
-        return OTPVerifyResponse(success=False, message="Código OTP expirado")
-    
-    # Mark OTP as used
-    await db.otps.update_one(
-        {"id": otp_doc['id']},
-        {"$set": {"used": True}}
-    )
+        return OTPVerifyResponse(success=False, message=message)
     
     await log_audit(
         request_id=request.request_id,
@@ -458,70 +3697,184 @@ async def verify_otp(request: OTPVerifyRequest):
     
     return OTPVerifyResponse(success=True, message="OTP verificado exitosamente")
 
+@api_router.post("/signature-requests/verify-otp", response_model=OTPVerifyResponse)
+async def verify_otp(request: OTPVerifyRequest, http_request: Request):
+    ip = client_ip(http_request)
+    await enforce_rate_limits("otp_verify", [
+        (ip, OTP_VERIFY_IP_BURST, OTP_VERIFY_IP_PER_MINUTE),
+        (request.request_id, OTP_VERIFY_BURST, OTP_VERIFY_PER_MINUTE)
+    ])
+    
+    sig_request = await db.signature_requests.find_one(
+        {"id": request.request_id},
+        {"_id": 0, "id": 1, "status": 1, "otp_locked_until": 1, "otp_failed_attempts": 1}
+    )
+    if not sig_request:
+        raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+    check_otp_lockout(sig_request)
+    require_transition(sig_request, "otp_verified")
+    
+    result = await check_otp(request)
+    if not result.success:
+        await record_failed_verification(request.request_id)
+        return result
+    
+    if not await transition_status(request.request_id, "otp_verified", fields={"otp_failed_attempts": 0}):
+        raise HTTPException(status_code=409, detail="El estado de la solicitud cambió, solicite un nuevo código")
+    return result
+
 # Contract Signing
+async def signed_response(sig_request: Dict, idempotency_key: Optional[str]) -> Dict:
+    """Replay the result of a completed signing for a retry with the same key.
+
+    If the audit entry or confirmation email of that signing failed after the
+    signed state was committed, they are completed now.
+    """
+    if not idempotency_key or sig_request.get('sign_idempotency_key') != idempotency_key:
+        raise HTTPException(status_code=409, detail="La solicitud ya fue firmada")
+    if sig_request.get('signing_finalized') is False:
+        await finalize_signing(sig_request)
+    return {
+        "success": True,
+        "message": "Contrato firmado exitosamente",
+        "signed_hash": sig_request['signed_file_hash']
+    }
+
 @api_router.post("/signature-requests/sign")
-async def sign_contract(request: SignContractRequest):
+async def sign_contract(request: SignContractRequest, idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key")):
+    idempotency_key = request.idempotency_key or idempotency_key_header
     sig_request = await db.signature_requests.find_one({"id": request.request_id}, {"_id": 0})
     if not sig_request:
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
+    if sig_request.get('status') == "signed":
+        return await signed_response(sig_request, idempotency_key)
+    if sig_request.get('status') != "otp_verified":
+        raise HTTPException(status_code=409, detail="Debe verificar el código OTP antes de firmar")
     
-    contract = await db.contracts.find_one({"id": sig_request['contract_id']}, {"_id": 0})
+    contract = await get_cached_contract(sig_request['contract_id'])
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
     
-    # For this MVP, we'll store the signed data as JSON alongside the original PDF
-    signed_file_id = str(uuid.uuid4())
-    signed_data_path = SIGNED_DIR / f"{signed_file_id}_data.json"
-    signed_pdf_path = SIGNED_DIR / f"{signed_file_id}.pdf"
-    
-    # Copy original PDF
-    import shutil
-    shutil.copy(contract['file_path'], signed_pdf_path)
+    # Claim the request so a double submit does not sign (and email) twice
+    signed_at = datetime.now(timezone.utc)
+    claim_id = str(uuid.uuid4())
+    claimed = await db.signature_requests.find_one_and_update(
+        {
+            "id": request.request_id,
+            "status": "otp_verified",
+            "$or": [
+                {"signing_started_at": None},
+                {"signing_started_at": {"$lt": signed_at - timedelta(seconds=SIGN_CLAIM_TIMEOUT_SECONDS)}}
+            ]
+        },
+        {"$set": {
+            "signing_claim": claim_id,
+            "signing_started_at": signed_at,
+            "sign_idempotency_key": idempotency_key
+        }},
+        projection={"_id": 0, "id": 1}
+    )
+    if not claimed:
+        current = await db.signature_requests.find_one({"id": request.request_id}, {"_id": 0})
+        if current and current.get('status') == "signed":
+            return await signed_response(current, idempotency_key)
+        raise HTTPException(status_code=409, detail="La firma de esta solicitud ya está en proceso")
     
-    # Save form data and signature metadata
+    try:
+        return await complete_signing(request, sig_request, contract, signed_at, claim_id)
+    except BaseException:
+        await db.signature_requests.update_one(
+            {"id": request.request_id, "status": "otp_verified", "signing_claim": claim_id},
+            {"$unset": {"signing_claim": "", "signing_started_at": ""}}
+        )
+        raise
+
+async def complete_signing(request: SignContractRequest, sig_request: Dict, contract: Contract, signed_at: datetime, claim_id: str) -> Dict:
+    """Produce and store the signed PDF for a claimed request and mark it signed"""
     signature_data = {
         "request_id": request.request_id,
         "contract_id": sig_request['contract_id'],
+        "contract_name": contract.name,
         "signer_name": sig_request['signer_name'],
         "signer_email": sig_request['signer_email'],
+        "signer_phone": sig_request.get('signer_phone'),
         "form_data": request.form_data,
-        "signed_at": datetime.now(timezone.utc).isoformat(),
+        "signed_at": signed_at.isoformat(),
         "ip_address": request.ip_address,
         "user_agent": request.user_agent,
-        "original_file_hash": contract['file_hash']
+        "original_file_hash": contract.file_hash
     }
     
-    with open(signed_data_path, 'w') as f:
-        json.dump(signature_data, f, indent=2)
-    
-    # Calculate hash of signed document
-    signed_hash = calculate_file_hash(signed_pdf_path)
+    # Fill and flatten the form, append the audit page and store the result by hash
+    if await ensure_blob(contract.file_hash, contract.file_path) is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    source_path = await io_executor.run(storage.fetch, blob_key(contract.file_hash))
+    tmp_path = BLOBS_TMP_DIR / f"{uuid.uuid4()}.part"
+    try:
+        signed = await pdf_executor.run(
+            sign_pdf, str(source_path), str(tmp_path), request.form_data, signature_data
+        )
+    except ValueError as e:
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise HTTPException(status_code=422, detail=str(e))
+    except BaseException:
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise
+    signed_pdf_path = await store_blob(tmp_path, signed['hash'], signed['size'])
+    signed_hash = signed['hash']
     
-    # Update signature request
-    await db.signature_requests.update_one(
-        {"id": request.request_id},
-        {
-            "$set": {
-                "status": "signed",
-                "signed_at": datetime.now(timezone.utc).isoformat(),
-                "signed_file_path": str(signed_pdf_path),
-                "signed_file_hash": signed_hash
-            }
-        }
+    # Keep the signature metadata alongside, as before
+    await io_executor.run(
+        storage.put_bytes,
+        signature_data_key(signed_hash),
+        json.dumps(signature_data, indent=2).encode()
     )
     
+    # Update signature request, only if our claim still holds
+    fields = {
+        "signed_at": signed_at,
+        "signed_file_path": signed_pdf_path,
+        "signed_file_hash": signed_hash,
+        "signed_ip_address": request.ip_address,
+        "signed_user_agent": request.user_agent,
+        "signing_finalized": False
+    }
+    previous = await transition_status(request.request_id, "signed", query={"signing_claim": claim_id}, fields=fields)
+    if not previous:
+        raise HTTPException(status_code=409, detail="La firma de esta solicitud ya está en proceso")
+    await finalize_signing({**sig_request, **fields})
+    
+    return {
+        "success": True,
+        "message": "Contrato firmado exitosamente",
+        "signed_hash": signed_hash
+    }
+
+async def finalize_signing(sig_request: Dict):
+    """Index the signed PDF, write the contract_signed audit entry and queue the
+    confirmation email of a committed signing, then mark it finalized.
+
+    Each step is idempotent, so a replay with the same Idempotency-Key can
+    finish a signing whose follow-up failed without duplicating anything.
+    """
+    request_id = sig_request['id']
+    signed_at = as_utc(sig_request['signed_at'])
+    signed_hash = sig_request['signed_file_hash']
+    await register_document_hash("signed", signed_hash, sig_request['contract_id'], request_id, signed_at)
+    
     # Log audit
-    await log_audit(
-        request_id=request.request_id,
-        action="contract_signed",
-        details={
-            "signed_hash": signed_hash,
-            "ip_address": request.ip_address,
-            "user_agent": request.user_agent
-        },
-        ip_address=request.ip_address,
-        user_agent=request.user_agent
-    )
+    if not await db.audit_logs.find_one({"request_id": request_id, "action": "contract_signed"}, {"_id": 1}):
+        await log_audit(
+            request_id=request_id,
+            action="contract_signed",
+            details={
+                "signed_hash": signed_hash,
+                "ip_address": sig_request.get('signed_ip_address'),
+                "user_agent": sig_request.get('signed_user_agent')
+            },
+            ip_address=sig_request.get('signed_ip_address'),
+            user_agent=sig_request.get('signed_user_agent')
+        )
     
     # Send confirmation email
     email_body = f"""
@@ -530,7 +3883,7 @@ async def sign_contract(request: SignContractRequest):
         <h2 style="color: #002D54;">Contrato Firmado Exitosamente</h2>
         <p>Estimado/a {sig_request['signer_name']},</p>
         <p>Su contrato ha sido firmado exitosamente.</p>
-        <p><strong>Fecha de firma:</strong> {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+        <p><strong>Fecha de firma:</strong> {signed_at.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
         <p><strong>Hash del documento:</strong> {signed_hash}</p>
         <p>Gracias por su confianza.</p>
         <br>
@@ -539,70 +3892,244 @@ async def sign_contract(request: SignContractRequest):
     </html>
     """
     
-    await send_email(
-        to_email=sig_request['signer_email'],
+    notification = build_notification(
+        channel="email",
+        to=sig_request['signer_email'],
         subject="Contrato Firmado - Academia Jotuns",
-        body=email_body
+        body=email_body,
+        request_id=request_id
     )
+    # One confirmation per request: a replay reuses the same notification id
+    notification['id'] = str(uuid.uuid5(uuid.NAMESPACE_URL, f"contract_signed:{request_id}"))
+    try:
+        await db.notifications.insert_one(notification)
+        notification_wakeup.set()
+    except DuplicateKeyError:
+        pass
     
-    return {
-        "success": True,
-        "message": "Contrato firmado exitosamente",
-        "signed_hash": signed_hash
-    }
+    await db.signature_requests.update_one({"id": request_id}, {"$set": {"signing_finalized": True}})
 
 # Audit Logs
 @api_router.get("/audit-logs", response_model=List[AuditLog])
 async def get_audit_logs(request_id: Optional[str] = None):
     query = {"request_id": request_id} if request_id else {}
-    logs = await db.audit_logs.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    
-    for log in logs:
-        if isinstance(log.get('timestamp'), str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-    
-    return logs
+    return await db.audit_logs.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
+
+AUDIT_EXPORT_COLUMNS = [
+    "id", "request_id", "action", "timestamp", "ip_address", "user_agent", "details",
+    "seq", "prev_hash", "entry_hash", "checkpoint"
+]
+
+@api_router.get("/audit-logs/export")
+async def export_audit_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=EXPORT_MAX_BATCH_SIZE),
+    request_id: Optional[str] = None,
+    action: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    query = build_date_range_query("timestamp", date_from, date_to)
+    if request_id:
+        query["request_id"] = request_id
+    if action:
+        query["action"] = action
+    cursor = db.audit_logs.find(query, {"_id": 0}).sort("timestamp", ASCENDING).batch_size(batch_size)
+    return export_response(cursor, AUDIT_EXPORT_COLUMNS, "auditoria", format, gzip)
+
+@api_router.get("/audit-logs/verify")
+async def verify_audit_logs(request_id: Optional[str] = None):
+    await audit_writer.flush()
+    return await verify_audit_log(request_id)
+
+@api_router.get("/audit-logs/{log_id}/proof")
+async def get_audit_log_proof(log_id: str):
+    entry = await db.audit_logs.find_one({"id": log_id}, {"_id": 0})
+    if not entry:
+        raise HTTPException(status_code=404, detail="Registro de auditoría no encontrado")
+    if not entry.get('entry_hash'):
+        raise HTTPException(status_code=409, detail="El registro es anterior al encadenamiento de auditoría")
+    return await audit_inclusion_proof(entry)
 
 # Integrity Verification
 @api_router.post("/verify-integrity", response_model=VerifyIntegrityResponse)
 async def verify_integrity(request: VerifyIntegrityRequest):
-    # Check if hash exists in contracts
-    contract = await db.contracts.find_one({"file_hash": request.file_hash}, {"_id": 0})
-    if contract:
-        return VerifyIntegrityResponse(
-            valid=True,
-            message="Documento válido - Hash encontrado en contratos originales",
-            found_in_system=True
-        )
+    # Same document_hashes lookup as the batch endpoints, so both always agree
+    result = (await verify_integrity_batch([(request.file_hash, None)])).results[0]
+    return VerifyIntegrityResponse(
+        valid=result.valid,
+        message=result.message,
+        found_in_system=result.found_in_system
+    )
+
+async def verify_integrity_batch(items: List[tuple]) -> VerifyIntegrityBatchResponse:
+    """Resolve (file_hash, file_name) pairs against document_hashes in one query"""
+    hashes = list({file_hash for file_hash, _ in items if SHA256_HEX.match(file_hash)})
+    found = await lookup_document_hashes(hashes)
     
-    # Check if hash exists in signed documents
-    sig_request = await db.signature_requests.find_one({"signed_file_hash": request.file_hash}, {"_id": 0})
-    if sig_request:
-        return VerifyIntegrityResponse(
-            valid=True,
-            message="Documento válido - Hash encontrado en contratos firmados",
-            found_in_system=True
+    results = []
+    for file_hash, file_name in items:
+        matches = found.get(file_hash, [])
+        if not SHA256_HEX.match(file_hash):
+            message = "Hash inválido - se esperaba SHA-256 en hexadecimal"
+        elif not matches:
+            message = "Hash no encontrado en el sistema"
+        elif any(match['kind'] == "signed" for match in matches):
+            message = "Documento válido - Hash encontrado en contratos firmados"
+        else:
+            message = "Documento válido - Hash encontrado en contratos originales"
+        results.append(VerifyIntegrityBatchItem(
+            file_hash=file_hash,
+            file_name=file_name,
+            valid=bool(matches),
+            message=message,
+            found_in_system=bool(matches),
+            matches=matches
+        ))
+    return VerifyIntegrityBatchResponse(
+        total=len(results),
+        found=sum(1 for item in results if item.found_in_system),
+        results=results
+    )
+
+async def stored_file_path(match: Dict) -> Optional[str]:
+    """file_path recorded for an indexed document (for files not yet in the blob store)"""
+    if match['kind'] == "signed":
+        doc = await db.signature_requests.find_one({"id": match['request_id']}, {"_id": 0, "signed_file_path": 1})
+        return doc.get('signed_file_path') if doc else None
+    doc = await db.contracts.find_one({"id": match['contract_id']}, {"_id": 0, "file_path": 1})
+    return doc.get('file_path') if doc else None
+
+async def check_stored_file(file_hash: str, matches: List[Dict]) -> str:
+    """Re-hash the stored copy of a document: intact, corrupted or missing"""
+    size = await ensure_blob(file_hash, None)
+    if size is None:
+        for match in matches:
+            try:
+                size = await ensure_blob(file_hash, await stored_file_path(match))
+            except HTTPException:
+                return "corrupted"
+            if size is not None:
+                break
+    if size is None:
+        return "missing"
+    stored_hash = await io_executor.run(hash_stored_object, blob_key(file_hash), size)
+    if stored_hash != file_hash:
+        logger.error(f"Stored blob {file_hash} is corrupted (content hashes to {stored_hash})")
+        return "corrupted"
+    return "intact"
+
+@api_router.post("/verify-integrity/upload", response_model=VerifyIntegrityFileResponse)
+async def verify_integrity_file(file: UploadFile = File(...)):
+    # Hash the spooled upload in chunks; it is never written to storage
+    file_hash, size = await hash_upload(file, VERIFY_MAX_UPLOAD_SIZE)
+    matches = (await lookup_document_hashes([file_hash])).get(file_hash, [])
+    if not matches:
+        return VerifyIntegrityFileResponse(
+            valid=False,
+            message="Hash no encontrado en el sistema",
+            found_in_system=False,
+            file_hash=file_hash,
+            file_size=size
         )
     
-    return VerifyIntegrityResponse(
-        valid=False,
-        message="Hash no encontrado en el sistema",
-        found_in_system=False
+    source = "contratos firmados" if any(match['kind'] == "signed" for match in matches) else "contratos originales"
+    storage_status = await check_stored_file(file_hash, matches)
+    if storage_status == "intact":
+        message = f"Documento válido - Hash encontrado en {source}"
+    elif storage_status == "corrupted":
+        message = f"Documento válido - Hash encontrado en {source}, pero la copia almacenada está dañada"
+    else:
+        message = f"Documento válido - Hash encontrado en {source}, pero la copia almacenada no está disponible"
+    return VerifyIntegrityFileResponse(
+        valid=True,
+        message=message,
+        found_in_system=True,
+        file_hash=file_hash,
+        file_size=size,
+        matches=matches,
+        storage_status=storage_status
     )
 
+@api_router.post("/verify-integrity/batch", response_model=VerifyIntegrityBatchResponse)
+async def verify_integrity_hashes(request: VerifyIntegrityBatchRequest):
+    if len(request.file_hashes) > VERIFY_BATCH_MAX_HASHES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Se permiten como máximo {VERIFY_BATCH_MAX_HASHES} hashes por solicitud"
+        )
+    return await verify_integrity_batch([(file_hash.strip().lower(), None) for file_hash in request.file_hashes])
+
+@api_router.post("/verify-integrity/batch/upload", response_model=VerifyIntegrityBatchResponse)
+async def verify_integrity_files(files: List[UploadFile] = File(...)):
+    if len(files) > VERIFY_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Se permiten como máximo {VERIFY_BATCH_MAX_FILES} archivos por solicitud"
+        )
+    # Hash each spooled file in chunks; nothing is written to storage
+    items = []
+    for file in files:
+        file_hash, _ = await hash_upload(file, VERIFY_MAX_UPLOAD_SIZE)
+        items.append((file_hash, Path(file.filename or "").name or None))
+    return await verify_integrity_batch(items)
+
 # Dashboard Stats
+async def compute_dashboard_stats() -> Dict:
+    """Read the incrementally maintained counters: the stats document plus the
+    top contracts and recent days from stats_counters (both index-backed)"""
+    stats = await db.stats.find_one({"_id": STATS_ID})
+    if stats is None:
+        await reconcile_stats()
+        stats = await db.stats.find_one({"_id": STATS_ID})
+    
+    by_status = {status: count for status, count in stats.get('by_status', {}).items() if count}
+    since = stats_day(datetime.now(timezone.utc) - timedelta(days=DASHBOARD_STATS_DAYS))
+    top_contracts, recent_days = await asyncio.gather(
+        db.stats_counters.find({"kind": "contract", "total": {"$gt": 0}}).sort(
+            "total", DESCENDING
+        ).limit(DASHBOARD_STATS_TOP_CONTRACTS).to_list(DASHBOARD_STATS_TOP_CONTRACTS),
+        db.stats_counters.find({"kind": "day", "key": {"$gte": since}, "total": {"$gt": 0}}).sort(
+            "key", ASCENDING
+        ).to_list(None)
+    )
+    by_contract = [
+        {"contract_id": doc['key'], "total": doc.get('total', 0), "signed": doc.get('signed', 0)}
+        for doc in top_contracts
+    ]
+    by_day = [
+        {"date": doc['key'], "total": doc.get('total', 0), "signed": doc.get('signed', 0)}
+        for doc in recent_days
+    ]
+    
+    return {
+        "total_contracts": stats.get('total_contracts', 0),
+        "total_requests": stats.get('total_requests', 0),
+        "pending_requests": by_status.get("pending", 0),
+        "signed_requests": by_status.get("signed", 0),
+        "by_status": by_status,
+        "by_contract": by_contract,
+        "by_day": by_day
+    }
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats():
-    total_contracts = await db.contracts.count_documents({})
-    total_requests = await db.signature_requests.count_documents({})
-    pending_requests = await db.signature_requests.count_documents({"status": "pending"})
-    signed_requests = await db.signature_requests.count_documents({"status": "signed"})
-    
+    return await dashboard_stats_cache.get(compute_dashboard_stats)
+
+
+# System Metrics
+@api_router.get("/metrics")
+async def get_metrics():
     return {
-        "total_contracts": total_contracts,
-        "total_requests": total_requests,
-        "pending_requests": pending_requests,
-        "signed_requests": signed_requests
+        "executors": {
+            io_executor.name: io_executor.metrics(),
+            pdf_executor.name: pdf_executor.metrics()
+        },
+        "smtp": smtp_pool.metrics(),
+        "contract_cache": contract_cache.metrics(),
+        "audit_writer": audit_writer.metrics(),
+        "rate_limiter": rate_limiter.metrics()
     }
 
 
@@ -615,6 +4142,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Accept-Ranges", "Retry-After"],
 )
 
 # Configure logging
@@ -624,6 +4152,139 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    if os.environ.get('ENSURE_INDEXES', 'true').lower() == 'true':
+        await ensure_indexes()
+
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_background_workers():
+    audit_writer.start()
+    start_notification_workers()
+    if STATS_RECONCILE_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(stats_reconcile_worker()))
+    if AUDIT_CHECKPOINT_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(audit_checkpoint_worker()))
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await stop_notification_workers()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await audit_writer.close()
+    await smtp_pool.close_all()
+    await http_client.close()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    io_executor.shutdown()
+    pdf_executor.shutdown()
+
+
+def benchmark_sign_pdf(pdf_path: str, iterations: int) -> Dict:
+    """Run sign_pdf repeatedly on pdf_path and report throughput"""
+    import tempfile
+    
+    form_data = {field['name']: "Prueba de rendimiento" for field in extract_pdf_fields(Path(pdf_path))}
+    signature_info = {
+        "contract_name": Path(pdf_path).name,
+        "signer_name": "Benchmark",
+        "signer_email": "benchmark@example.com",
+        "signed_at": datetime.now(timezone.utc).isoformat(),
+        "original_file_hash": calculate_file_hash(Path(pdf_path))
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = str(Path(tmp_dir) / "signed.pdf")
+        started = time.perf_counter()
+        for _ in range(iterations):
+            result = sign_pdf(pdf_path, output, form_data, signature_info)
+        elapsed = time.perf_counter() - started
+    
+    pages = (result['pages'] - 1) * iterations
+    return {
+        "iterations": iterations,
+        "pages_per_document": result['pages'] - 1,
+        "fields": len(form_data),
+        "avg_ms_per_document": round(elapsed / iterations * 1000, 2),
+        "pages_per_second": round(pages / elapsed, 2),
+        "mb_per_second": round(result['size'] * iterations / elapsed / (1024 * 1024), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sistema de Firma Electrónica - tareas de mantenimiento")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ensure-indexes", help="Crear los índices declarados en INDEX_SPECS")
+    subparsers.add_parser("check-indexes", help="Reportar índices faltantes o sin uso")
+    bench_parser = subparsers.add_parser("bench-sign", help="Medir el rendimiento de firma de PDFs (páginas/s)")
+    bench_parser.add_argument("pdf", help="PDF de prueba")
+    bench_parser.add_argument("--iterations", type=int, default=5)
+    subparsers.add_parser("reconcile-stats", help="Recalcular los contadores del dashboard")
+    gc_parser = subparsers.add_parser("gc-blobs", help="Eliminar blobs sin referencias")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Solo reportar, sin eliminar")
+    migrate_parser = subparsers.add_parser(
+        "migrate-storage", help="Copiar los archivos existentes al backend de almacenamiento configurado"
+    )
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Solo reportar, sin copiar")
+    timestamps_parser = subparsers.add_parser(
+        "migrate-timestamps", help="Convertir fechas guardadas como texto a fechas BSON"
+    )
+    timestamps_parser.add_argument("--batch-size", type=int, default=1000)
+    timestamps_parser.add_argument("--dry-run", action="store_true", help="Solo reportar, sin modificar")
+    subparsers.add_parser("audit-checkpoint", help="Crear checkpoints Merkle de las entradas de auditoría pendientes")
+    verify_audit_parser = subparsers.add_parser("verify-audit", help="Verificar cadenas de hash y checkpoints de auditoría")
+    verify_audit_parser.add_argument("--request-id", help="Verificar solo la cadena de una solicitud")
+    proof_parser = subparsers.add_parser("audit-proof", help="Prueba de inclusión de una entrada de auditoría")
+    proof_parser.add_argument("log_id")
+    backfill_parser = subparsers.add_parser(
+        "backfill-document-hashes", help="Indexar en document_hashes los contratos y firmas existentes"
+    )
+    backfill_parser.add_argument("--batch-size", type=int, default=1000)
+    backfill_parser.add_argument("--dry-run", action="store_true", help="Solo reportar, sin modificar")
+    args = parser.parse_args()
+    
+    if args.command == "bench-sign":
+        print(json.dumps(benchmark_sign_pdf(args.pdf, args.iterations), indent=2))
+        return
+    
+    async def run():
+        if args.command == "ensure-indexes":
+            await ensure_indexes()
+            print(json.dumps(await check_indexes(), indent=2))
+        elif args.command == "check-indexes":
+            print(json.dumps(await check_indexes(), indent=2))
+        elif args.command == "reconcile-stats":
+            print(json.dumps(await reconcile_stats(), indent=2))
+        elif args.command == "gc-blobs":
+            print(json.dumps(await collect_garbage_blobs(dry_run=args.dry_run), indent=2))
+        elif args.command == "migrate-storage":
+            print(json.dumps(await migrate_storage(dry_run=args.dry_run), indent=2))
+        elif args.command == "migrate-timestamps":
+            print(json.dumps(await migrate_timestamps(args.batch_size, dry_run=args.dry_run), indent=2))
+        elif args.command == "backfill-document-hashes":
+            print(json.dumps(await backfill_document_hashes(args.batch_size, dry_run=args.dry_run), indent=2))
+        elif args.command == "audit-checkpoint":
+            checkpoints = []
+            while checkpoint := await create_audit_checkpoint():
+                checkpoints.append(checkpoint)
+            print(json.dumps(checkpoints, indent=2, default=str))
+        elif args.command == "verify-audit":
+            report = await verify_audit_log(args.request_id)
+            print(json.dumps(report, indent=2))
+            if not report["valid"]:
+                raise SystemExit(1)
+        elif args.command == "audit-proof":
+            print(json.dumps(await get_audit_log_proof(args.log_id), indent=2, default=str))
+    
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
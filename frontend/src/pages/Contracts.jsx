@@ -18,6 +18,8 @@ const Contracts = () => {
   const navigate = useNavigate();
   const [contracts, setContracts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState({ name: '', description: '', file: null });
   const [uploading, setUploading] = useState(false);
@@ -35,6 +37,7 @@ const Contracts = () => {
     try {
       const response = await axios.get(`${API}/contracts`);
       setContracts(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Error al cargar contratos');
     } finally {
@@ -42,6 +45,19 @@ const Contracts = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/contracts`, { params: { cursor: nextCursor } });
+      setContracts((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast.error('Error al cargar contratos');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleUpload = async (e) => {
     e.preventDefault();
     if (!formData.file) {
@@ -214,6 +230,19 @@ const Contracts = () => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center">
+            <Button
+              data-testid="load-more-contracts-btn"
+              onClick={loadMore}
+              variant="outline"
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Cargando...' : 'Cargar más'}
+            </Button>
+          </div>
+        )}
       </div>
     </AdminLayout>
   );
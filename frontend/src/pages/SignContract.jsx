@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import axios from 'axios';
 import { Button } from '@/components/ui/button';
@@ -20,6 +20,8 @@ const SignContract = () => {
   const [otp, setOtp] = useState('');
   const [formData, setFormData] = useState({});
   const [loading, setLoading] = useState(false);
+  // Same key for every retry of this signature, so the backend signs only once
+  const idempotencyKey = useRef(crypto.randomUUID());
 
   useEffect(() => {
     fetchRequest();
@@ -33,14 +35,14 @@ const SignContract = () => {
       const contractResponse = await axios.get(`${API}/contracts/${response.data.contract_id}`);
       setContract(contractResponse.data);
 
-      // Initialize form data with empty values
+      // Initialize form data with the PDF default values
       const initialData = {};
       contractResponse.data.fields.forEach(field => {
-        initialData[field.name] = '';
+        initialData[field.name] = field.default || '';
       });
       setFormData(initialData);
 
-      setStep('otp');
+      setStep(response.data.status === 'signed' ? 'success' : 'otp');
     } catch (error) {
       toast.error('Solicitud no encontrada o inválida');
       setStep('error');
@@ -53,7 +55,7 @@ const SignContract = () => {
       await axios.post(`${API}/signature-requests/send-otp`, { request_id: request.id });
       toast.success('Código OTP enviado a su correo electrónico');
     } catch (error) {
-      toast.error('Error al enviar OTP');
+      toast.error(error.response?.data?.detail || 'Error al enviar OTP');
     } finally {
       setLoading(false);
     }
@@ -79,7 +81,7 @@ const SignContract = () => {
         toast.error(response.data.message);
       }
     } catch (error) {
-      toast.error('Código inválido o expirado');
+      toast.error(error.response?.data?.detail || 'Código inválido o expirado');
     } finally {
       setLoading(false);
     }
@@ -94,13 +96,14 @@ const SignContract = () => {
         request_id: request.id,
         form_data: formData,
         ip_address: await fetch('https://api.ipify.org?format=json').then(r => r.json()).then(d => d.ip).catch(() => 'unknown'),
-        user_agent: navigator.userAgent
+        user_agent: navigator.userAgent,
+        idempotency_key: idempotencyKey.current
       });
 
       toast.success('Contrato firmado exitosamente');
       setStep('success');
     } catch (error) {
-      toast.error('Error al firmar contrato');
+      toast.error(error.response?.data?.detail || 'Error al firmar contrato');
     } finally {
       setLoading(false);
     }
@@ -15,11 +15,26 @@ import { toast } from 'sonner';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// The contract picker lists every template, following the cursor page by page
+const fetchAllContracts = async () => {
+  const contracts = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(`${API}/contracts`, { params: { cursor } });
+    contracts.push(...response.data);
+    cursor = response.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return contracts;
+};
+
 const SignatureRequests = () => {
   const navigate = useNavigate();
   const [requests, setRequests] = useState([]);
   const [contracts, setContracts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [contractSearch, setContractSearch] = useState('');
   const [dialogOpen, setDialogOpen] = useState(false);
   const [formData, setFormData] = useState({
     contract_id: '',
@@ -41,12 +56,13 @@ const SignatureRequests = () => {
 
   const fetchData = async () => {
     try {
-      const [requestsRes, contractsRes] = await Promise.all([
+      const [requestsRes, allContracts] = await Promise.all([
         axios.get(`${API}/signature-requests`),
-        axios.get(`${API}/contracts`)
+        fetchAllContracts()
       ]);
       setRequests(requestsRes.data);
-      setContracts(contractsRes.data);
+      setNextCursor(requestsRes.headers['x-next-cursor'] || null);
+      setContracts(allContracts);
     } catch (error) {
       toast.error('Error al cargar datos');
     } finally {
@@ -54,6 +70,24 @@ const SignatureRequests = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/signature-requests`, { params: { cursor: nextCursor } });
+      setRequests((current) => [...current, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast.error('Error al cargar solicitudes');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const filteredContracts = contracts.filter((contract) =>
+    contract.id === formData.contract_id ||
+    contract.name.toLowerCase().includes(contractSearch.trim().toLowerCase())
+  );
+
   const handleCreate = async (e) => {
     e.preventDefault();
     setCreating(true);
@@ -93,8 +127,10 @@ const SignatureRequests = () => {
     const variants = {
       pending: { variant: 'secondary', text: 'Pendiente' },
       otp_sent: { variant: 'default', text: 'OTP Enviado' },
+      otp_verified: { variant: 'default', text: 'OTP Verificado' },
       signed: { variant: 'default', text: 'Firmado', className: 'bg-green-100 text-green-700 hover:bg-green-200' },
       rejected: { variant: 'destructive', text: 'Rechazado' },
+      expired: { variant: 'secondary', text: 'Vencido' },
     };
     const config = variants[status] || variants.pending;
     return <Badge className={config.className} variant={config.variant}>{config.text}</Badge>;
@@ -133,6 +169,13 @@ const SignatureRequests = () => {
               <form onSubmit={handleCreate} className="space-y-4">
                 <div className="space-y-2">
                   <Label htmlFor="contract">Contrato *</Label>
+                  <Input
+                    id="contract-search"
+                    data-testid="contract-search-input"
+                    value={contractSearch}
+                    onChange={(e) => setContractSearch(e.target.value)}
+                    placeholder="Buscar contrato por nombre"
+                  />
                   <Select
                     value={formData.contract_id}
                     onValueChange={(value) => setFormData({ ...formData, contract_id: value })}
@@ -141,7 +184,7 @@ const SignatureRequests = () => {
                       <SelectValue placeholder="Seleccione un contrato" />
                     </SelectTrigger>
                     <SelectContent>
-                      {contracts.map((contract) => (
+                      {filteredContracts.map((contract) => (
                         <SelectItem key={contract.id} value={contract.id}>
                           {contract.name}
                         </SelectItem>
@@ -260,6 +303,19 @@ const SignatureRequests = () => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center">
+            <Button
+              data-testid="load-more-requests-btn"
+              onClick={loadMore}
+              variant="outline"
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Cargando...' : 'Cargar más'}
+            </Button>
+          </div>
+        )}
       </div>
     </AdminLayout>
   );
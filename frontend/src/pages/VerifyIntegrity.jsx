@@ -26,41 +26,19 @@ const VerifyIntegrity = () => {
     }
   }, [navigate]);
 
-  const calculateFileHash = async (file) => {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader();
-      reader.onload = async (e) => {
-        const arrayBuffer = e.target.result;
-        const hashBuffer = await crypto.subtle.digest('SHA-256', arrayBuffer);
-        const hashArray = Array.from(new Uint8Array(hashBuffer));
-        const hashHex = hashArray.map(b => b.toString(16).padStart(2, '0')).join('');
-        resolve(hashHex);
-      };
-      reader.onerror = reject;
-      reader.readAsArrayBuffer(file);
-    });
-  };
-
-  const handleFileSelect = async (e) => {
+  const handleFileSelect = (e) => {
     const file = e.target.files[0];
     if (!file) return;
 
+    // The server hashes the file while it uploads and re-checks the stored copy
     setSelectedFile(file);
-    toast.info('Calculando hash del archivo...');
-
-    try {
-      const hash = await calculateFileHash(file);
-      setFileHash(hash);
-      toast.success('Hash calculado exitosamente');
-    } catch (error) {
-      toast.error('Error al calcular hash');
-    }
+    setFileHash('');
   };
 
   const handleVerify = async (e) => {
     e.preventDefault();
-    if (!fileHash) {
-      toast.error('Por favor ingrese o calcule un hash');
+    if (!fileHash && !selectedFile) {
+      toast.error('Por favor cargue un archivo o ingrese un hash');
       return;
     }
 
@@ -68,7 +46,15 @@ const VerifyIntegrity = () => {
     setResult(null);
 
     try {
-      const response = await axios.post(`${API}/verify-integrity`, { file_hash: fileHash });
+      let response;
+      if (selectedFile) {
+        const formData = new FormData();
+        formData.append('file', selectedFile);
+        response = await axios.post(`${API}/verify-integrity/upload`, formData);
+        setFileHash(response.data.file_hash);
+      } else {
+        response = await axios.post(`${API}/verify-integrity`, { file_hash: fileHash });
+      }
       setResult(response.data);
       if (response.data.valid) {
         toast.success(response.data.message);
@@ -76,7 +62,7 @@ const VerifyIntegrity = () => {
         toast.warning(response.data.message);
       }
     } catch (error) {
-      toast.error('Error al verificar integridad');
+      toast.error(error.response?.data?.detail || 'Error al verificar integridad');
     } finally {
       setVerifying(false);
     }
@@ -103,7 +89,7 @@ const VerifyIntegrity = () => {
                   Puede verificar la integridad de un documento de dos formas:
                 </p>
                 <ul className="text-sm text-muted-foreground mt-2 space-y-1 list-disc list-inside">
-                  <li>Cargar el archivo PDF para calcular automáticamente su hash SHA-256</li>
+                  <li>Cargar el archivo PDF: el servidor calcula su hash SHA-256 y comprueba también la copia almacenada</li>
                   <li>Ingresar manualmente el hash si ya lo tiene</li>
                 </ul>
                 <p className="text-sm text-muted-foreground mt-2">
@@ -158,7 +144,10 @@ const VerifyIntegrity = () => {
                     data-testid="hash-input"
                     type="text"
                     value={fileHash}
-                    onChange={(e) => setFileHash(e.target.value)}
+                    onChange={(e) => {
+                      setFileHash(e.target.value);
+                      setSelectedFile(null);
+                    }}
                     placeholder="Ingrese el hash SHA-256 (64 caracteres hexadecimales)"
                     className="font-mono text-sm"
                   />
@@ -173,7 +162,7 @@ const VerifyIntegrity = () => {
                   data-testid="verify-submit-btn"
                   type="submit"
                   className="w-full bg-brand-blue hover:bg-brand-blue/90"
-                  disabled={verifying || !fileHash}
+                  disabled={verifying || (!fileHash && !selectedFile)}
                 >
                   {verifying ? 'Verificando...' : 'Verificar Integridad'}
                 </Button>
@@ -234,6 +223,16 @@ const VerifyIntegrity = () => {
                           {result.found_in_system ? 'SÍ' : 'NO'}
                         </span>
                       </div>
+                      {result.storage_status && (
+                        <div className="flex justify-between items-center py-2 border-t border-current/20">
+                          <span className="text-sm font-medium">Copia Almacenada</span>
+                          <span className={`text-sm font-semibold ${
+                            result.storage_status === 'intact' ? 'text-green-700' : 'text-red-700'
+                          }`}>
+                            {{ intact: 'ÍNTEGRA', corrupted: 'DAÑADA', missing: 'NO DISPONIBLE' }[result.storage_status]}
+                          </span>
+                        </div>
+                      )}
                     </div>
                   </div>
 
@@ -0,0 +1,33 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# Tests never touch the configured database: MongoDB-backed tests use a
+# throwaway database on TEST_MONGO_URL that is dropped afterwards.
+os.environ["MONGO_URL"] = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = f"contratos_test_{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def mongo_db_name():
+    """Name of a fresh database on TEST_MONGO_URL; skips when MongoDB is not reachable"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    client = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip("MongoDB no disponible en TEST_MONGO_URL")
+    name = f"contratos_test_{uuid.uuid4().hex[:12]}"
+    try:
+        yield name
+    finally:
+        client.drop_database(name)
+        client.close()
@@ -0,0 +1,66 @@
+import hashlib
+
+import pytest
+
+import server
+
+
+def entry_hashes(count: int) -> list:
+    return [hashlib.sha256(f"entry-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def reference_root(leaves: list) -> bytes:
+    """Straight recursive RFC 6962 Merkle Tree Hash"""
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    if len(leaves) == 1:
+        return server.merkle_leaf(leaves[0])
+    split = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return server.merkle_node(reference_root(leaves[:split]), reference_root(leaves[split:]))
+
+
+@pytest.mark.parametrize("size", range(0, 41))
+def test_merkle_root_matches_rfc6962(size):
+    leaves = entry_hashes(size)
+    assert server.merkle_root([server.merkle_leaf(leaf) for leaf in leaves]) == reference_root(leaves)
+
+
+@pytest.mark.parametrize("size", range(1, 41))
+def test_every_inclusion_proof_verifies(size):
+    leaves = entry_hashes(size)
+    nodes = [server.merkle_leaf(leaf) for leaf in leaves]
+    root = server.merkle_root(nodes).hex()
+    for index, leaf in enumerate(leaves):
+        path = [node.hex() for node in server.merkle_path(index, nodes)]
+        assert server.verify_merkle_path(leaf, index, size, path, root)
+        assert not server.verify_merkle_path(leaf, index, size, path + [root], root)
+        if size > 1:
+            assert not server.verify_merkle_path(leaf, (index + 1) % size, size, path, root)
+            assert not server.verify_merkle_path(leaves[(index + 1) % size], index, size, path, root)
+
+
+def test_proof_outside_tree_is_rejected():
+    leaves = entry_hashes(4)
+    nodes = [server.merkle_leaf(leaf) for leaf in leaves]
+    path = [node.hex() for node in server.merkle_path(3, nodes)]
+    assert not server.verify_merkle_path(leaves[3], 4, 4, path, server.merkle_root(nodes).hex())
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 4, 8, 16])
+@pytest.mark.parametrize("size", [1, 5, 16, 17, 33])
+def test_checkpoint_blocks_compose_into_one_tree(block_size, size):
+    """Proofs built like audit_inclusion_proof: path inside the block plus
+    the path of the block root among the block roots.
+    """
+    leaves = entry_hashes(size)
+    blocks = [leaves[start:start + block_size] for start in range(0, size, block_size)]
+    block_nodes = [[server.merkle_leaf(leaf) for leaf in block] for block in blocks]
+    block_roots = [server.merkle_root(nodes) for nodes in block_nodes]
+    root = server.merkle_root(block_roots).hex()
+    assert root == reference_root(leaves).hex()
+
+    for block_index, nodes in enumerate(block_nodes):
+        for position, leaf in enumerate(blocks[block_index]):
+            path = server.merkle_path(position, nodes) + server.merkle_path(block_index, block_roots)
+            leaf_index = block_index * block_size + position
+            assert server.verify_merkle_path(leaf, leaf_index, size, [node.hex() for node in path], root)
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+
+def test_unset_fields_are_reported_not_raised(mongo_db_name, monkeypatch):
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        try:
+            await server.ensure_indexes()
+            for request_id in ("req-1", "req-2"):
+                for i in range(3):
+                    await server.log_audit(request_id=request_id, action="otp_sent", details={"n": i})
+            await server.audit_writer.flush()
+            await server.create_audit_checkpoint()
+            for request_id in ("req-1", "req-2"):
+                await server.log_audit(request_id=request_id, action="otp_verified", details={})
+            await server.audit_writer.flush()
+            clean = await server.verify_audit_log()
+
+            # Checkpointed entry loses its timestamp, unchained tail entries lose chain and id fields
+            await server.db.audit_logs.update_one({"request_id": "req-1", "seq": 2}, {"$unset": {"timestamp": ""}})
+            await server.db.audit_logs.update_one({"request_id": "req-1", "seq": 4}, {"$unset": {"prev_hash": "", "id": ""}})
+            await server.db.audit_logs.update_one({"request_id": "req-2", "seq": 3}, {"$unset": {"entry_hash": ""}})
+            return clean, await server.verify_audit_log(), await server.verify_audit_log("req-1")
+        finally:
+            client.close()
+
+    clean, full, single = asyncio.run(run())
+    assert clean['valid'] and clean['entries'] == 8 and clean['checkpoints'] == 1
+
+    assert not full['valid']
+    kinds = {(p['type'], p.get('request_id'), p.get('seq')) for p in full['problems']}
+    assert ("missing_fields", "req-1", 2) in kinds
+    assert ("modified_entry", "req-1", 2) in kinds
+    assert ("missing_fields", "req-1", 4) in kinds
+    assert ("broken_link", "req-1", 4) in kinds
+    assert ("missing_fields", "req-2", 3) in kinds
+    assert any(p['type'] == "modified_checkpoint_entry" for p in full['problems'])
+    missing = next(p for p in full['problems'] if p['type'] == "missing_fields" and p['seq'] == 4)
+    assert missing['fields'] == ["id", "prev_hash"] and missing['id'] is None
+
+    assert not single['valid']
+    assert {p['request_id'] for p in single['problems']} == {"req-1"}
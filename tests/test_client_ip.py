@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import server
+
+
+def request_from(peer: str, forwarded: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 12345)})
+
+
+def test_socket_address_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 0)
+    assert server.client_ip(request_from("198.51.100.7", "203.0.113.1")) == "198.51.100.7"
+
+
+def test_entry_added_by_outermost_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 2)
+    request = request_from("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.1")
+    assert server.client_ip(request) == "198.51.100.7"
+    # Fewer entries than trusted hops: the header did not come through our proxies
+    assert server.client_ip(request_from("10.0.0.2", "1.2.3.4")) == "10.0.0.2"
+
+
+def test_forged_forwarded_for_cannot_escape_the_limit(monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 1)
+    monkeypatch.setattr(server, "rate_limiter", server.MemoryRateLimiter(max_keys=100))
+
+    async def send(forged: str):
+        # Nginx appends the real peer with $proxy_add_x_forwarded_for
+        ip = server.client_ip(request_from("127.0.0.1", f"{forged}, 198.51.100.7"))
+        await server.enforce_rate_limits("otp_send", [(ip, 3, 1)])
+
+    async def run():
+        for attempt in range(3):
+            await send(f"203.0.113.{attempt}")
+        with pytest.raises(HTTPException) as error:
+            await send("203.0.113.200")
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 429
+    assert list(server.rate_limiter.buckets) == ["otp_send:198.51.100.7"]
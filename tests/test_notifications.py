@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, smtp_server, session, envelope):
+        self.messages.append(envelope.rcpt_tos)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_stub(monkeypatch):
+    """Local SMTP server (no TLS, no auth) behind a fresh connection pool"""
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    monkeypatch.setenv("SMTP_PASS", "")
+    monkeypatch.setattr(server, "smtp_pool", server.SMTPConnectionPool(2, 60, 15, 5))
+    try:
+        yield handler
+    finally:
+        controller.stop()
+
+
+@pytest.fixture
+def sms_endpoint(monkeypatch):
+    """Fake webhook SMS gateway answering with the queued status codes"""
+    requests, statuses = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setenv("SMS_WEBHOOK_URL", f"http://127.0.0.1:{httpd.server_port}/sms")
+    monkeypatch.setattr(server, "sms_provider", server.WebhookSMSProvider())
+    try:
+        yield requests, statuses
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def run_with_db(mongo_db_name, monkeypatch, coro_fn):
+    """Run coro_fn() with server.db on the throwaway database and per-loop clients"""
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        monkeypatch.setattr(server, "http_client", server.HTTPClient(10, 10, 5))
+        monkeypatch.setattr(server, "notification_wakeup", asyncio.Event())
+        try:
+            await server.ensure_indexes()
+            return await coro_fn()
+        finally:
+            await server.audit_writer.flush()
+            await server.http_client.close()
+            await server.smtp_pool.close_all()
+            client.close()
+
+    return asyncio.run(run())
+
+
+def test_smtp_pool_reuses_one_session(smtp_stub):
+    async def run():
+        try:
+            single = [await server.send_email(f"a{i}@example.com", "Asunto", "<p>x</p>") for i in range(3)]
+            batch = await server.send_email_batch([
+                {"to_email": f"b{i}@example.com", "subject": "Asunto", "body": "<p>x</p>"} for i in range(4)
+            ])
+            return single + batch
+        finally:
+            await server.smtp_pool.close_all()
+
+    assert all(asyncio.run(run()))
+    assert len(smtp_stub.messages) == 7
+    assert server.smtp_pool.handshakes == 1
+
+
+def test_failed_login_closes_the_session(smtp_stub, monkeypatch):
+    # The stub offers no AUTH, so login() fails right after connect()
+    monkeypatch.setenv("SMTP_PASS", "secreto")
+    sessions = []
+
+    class TrackedSMTP(aiosmtplib.SMTP):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            sessions.append(self)
+
+    monkeypatch.setattr(server.aiosmtplib, "SMTP", TrackedSMTP)
+
+    assert asyncio.run(server.send_email("a@example.com", "Asunto", "x")) is False
+    assert len(sessions) == 1 and not sessions[0].is_connected
+    assert server.smtp_pool.handshakes == 0
+    assert server.smtp_pool.semaphore._value == server.smtp_pool.size
+
+
+def test_worker_delivers_queued_emails_in_one_session(smtp_stub, mongo_db_name, monkeypatch):
+    async def run():
+        ids = [
+            await server.enqueue_notification("email", f"c{i}@example.com", "<p>Su código es 123456</p>", "req-1", "OTP")
+            for i in range(3)
+        ]
+        worker = asyncio.create_task(server.notification_worker())
+        try:
+            for _ in range(100):
+                if await server.db.notifications.count_documents({"status": "sent"}) == len(ids):
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        return await server.db.notifications.find({}, {"_id": 0}).to_list(None)
+
+    docs = run_with_db(mongo_db_name, monkeypatch, run)
+    assert [doc['status'] for doc in docs] == ["sent"] * 3
+    assert all("body" not in doc and doc['expires_at'] for doc in docs)
+    assert len(smtp_stub.messages) == 3
+    assert server.smtp_pool.handshakes == 1
+
+
+def test_sms_retries_with_backoff_then_dead_letters(sms_endpoint, mongo_db_name, monkeypatch):
+    requests, statuses = sms_endpoint
+    statuses.extend([500, 503])
+    monkeypatch.setattr(server, "NOTIFICATION_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(server, "NOTIFICATION_RETRY_BASE_SECONDS", 60)
+
+    async def run():
+        notification_id = await server.enqueue_notification("sms", "+573001112233", "Su código es 654321", "req-2")
+        await server.deliver_notification(await server.claim_notification())
+        retry = await server.db.notifications.find_one({"id": notification_id}, {"_id": 0})
+        # Not due again until the backoff has passed
+        not_due = await server.claim_notification()
+
+        await server.db.notifications.update_one(
+            {"id": notification_id},
+            {"$set": {"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+        )
+        await server.deliver_notification(await server.claim_notification())
+        dead = await server.db.notifications.find_one({"id": notification_id}, {"_id": 0})
+        return retry, not_due, dead
+
+    retry, not_due, dead = run_with_db(mongo_db_name, monkeypatch, run)
+    assert retry['status'] == "queued" and retry['attempts'] == 1
+    delay = (retry['next_attempt_at'] - retry['updated_at']).total_seconds()
+    assert 59 <= delay <= 61
+    assert not_due is None
+    assert dead['status'] == "dead" and dead['attempts'] == 2
+    assert "body" not in dead and dead['expires_at'] > dead['updated_at']
+    assert requests == [{"to": "+573001112233", "message": "Su código es 654321"}] * 2
+
+
+def test_sms_delivered_on_success(sms_endpoint, mongo_db_name, monkeypatch):
+    requests, _ = sms_endpoint
+
+    async def run():
+        notification_id = await server.enqueue_notification("sms", "+573001112233", "Hola", "req-3")
+        await server.deliver_notification(await server.claim_notification())
+        return await server.db.notifications.find_one({"id": notification_id}, {"_id": 0})
+
+    doc = run_with_db(mongo_db_name, monkeypatch, run)
+    assert doc['status'] == "sent" and doc['attempts'] == 1
+    assert len(requests) == 1
+
+
+def test_email_batch_lease_covers_worst_case_send_time(mongo_db_name, monkeypatch):
+    async def run():
+        for i in range(5):
+            await server.enqueue_notification("email", f"d{i}@example.com", "x", "req-4", "Asunto")
+        batch = [await server.claim_notification()]
+        batch += await server.claim_notifications("email", 19)
+        started = datetime.now(timezone.utc)
+        await server.extend_email_batch_lease(batch)
+        docs = await server.db.notifications.find({}, {"_id": 0}).to_list(None)
+        return started, docs, await server.claim_notification()
+
+    started, docs, reclaimed = run_with_db(mongo_db_name, monkeypatch, run)
+    minimum = started + timedelta(seconds=server.NOTIFICATION_LOCK_SECONDS + 5 * 2 * server.SMTP_TIMEOUT - 1)
+    assert all(doc['status'] == "sending" and doc['locked_until'] >= minimum for doc in docs)
+    assert reclaimed is None
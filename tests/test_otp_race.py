@@ -0,0 +1,43 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+
+async def verify_concurrently(request_id: str, otp: str, concurrency: int) -> list:
+    """Check the same OTP from many concurrent verifications"""
+    now = datetime.now(timezone.utc)
+    await server.db.otps.insert_one({
+        "id": str(uuid.uuid4()),
+        "request_id": request_id,
+        "otp": otp,
+        "issued_at": now,
+        "expiry": now + timedelta(minutes=10),
+        "used": False
+    })
+    try:
+        return await asyncio.gather(*(
+            server.check_otp(server.OTPVerifyRequest(request_id=request_id, otp=otp))
+            for _ in range(concurrency)
+        ))
+    finally:
+        await server.audit_writer.flush()
+
+
+def test_only_one_concurrent_verification_wins(mongo_db_name, monkeypatch):
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        try:
+            await server.ensure_indexes()
+            return await verify_concurrently(f"otp-race-{uuid.uuid4()}", server.generate_otp(), 100)
+        finally:
+            client.close()
+
+    results = asyncio.run(run())
+    assert sum(1 for result in results if result.success) == 1
+    assert all(not result.success and result.message for result in results if not result.success)
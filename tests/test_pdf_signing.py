@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import io
+
+import PyPDF2
+import pytest
+
+import server
+
+
+def build_form_pdf(xref_stream: bool) -> bytes:
+    """One-page PDF with a text field and a checkbox, using a classic
+    cross-reference table or a cross-reference stream.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R /AcroForm << /Fields [4 0 R 5 0 R] >> >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 6 0 R"
+        b" /Annots [4 0 R 5 0 R] /Resources << >> >>",
+        b"<< /Type /Annot /Subtype /Widget /FT /Tx /T (nombre) /Rect [50 700 250 720] /P 3 0 R >>",
+        b"<< /Type /Annot /Subtype /Widget /FT /Btn /T (acepta) /V /Off /AS /Off"
+        b" /Rect [50 650 70 670] /P 3 0 R /AP << /N << /Si 7 0 R /Off 7 0 R >> >> >>",
+        b"<< /Length 17 >>\nstream\n0 0 m 100 100 l S\nendstream",
+        b"<< /Type /XObject /Subtype /Form /BBox [0 0 20 20] /Length 0 >>\nstream\n\nendstream",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    xref_offset = out.tell()
+    if xref_stream:
+        size = len(objects) + 2
+        offsets.append(xref_offset)
+        data = b"\x00" + bytes(4) + b"\xff\xff" + b"".join(
+            b"\x01" + offset.to_bytes(4, "big") + bytes(2) for offset in offsets
+        )
+        out.write(
+            b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Length %d >>\nstream\n"
+            % (size - 1, size, len(data)) + data + b"\nendstream\nendobj\n"
+        )
+    else:
+        out.write(b"xref\n0 %d\n0000000000 65535 f\r\n" % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n\r\n" % offset)
+        out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1))
+    out.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+    return out.getvalue()
+
+
+SIGNATURE_INFO = {
+    "contract_name": "Contrato de prueba",
+    "contract_id": "contract-1",
+    "request_id": "request-1",
+    "signer_name": "Ana María Pérez",
+    "signer_email": "ana@example.com",
+    "ip_address": "192.0.2.1",
+    "user_agent": "pytest",
+    "signed_at": "2024-01-01T00:00:00+00:00",
+    "original_file_hash": "ab" * 32
+}
+
+
+@pytest.mark.parametrize("xref_stream", [False, True], ids=["xref-table", "xref-stream"])
+def test_sign_pdf_appends_incremental_update(tmp_path, xref_stream):
+    original = build_form_pdf(xref_stream)
+    source = tmp_path / "original.pdf"
+    source.write_bytes(original)
+    startxref = int(original.rsplit(b"startxref", 1)[1].split()[0])
+    with open(source, "rb") as f:
+        assert server.IncrementalUpdate.previous_xref(f) == (startxref, xref_stream)
+    fields = {field['name']: field['type'] for field in server.read_acroform_fields(PyPDF2.PdfReader(str(source)))}
+    assert fields == {"nombre": "text", "acepta": "checkbox"}
+
+    output = tmp_path / "signed.pdf"
+    result = server.sign_pdf(str(source), str(output), {"nombre": "Ana María", "acepta": True}, SIGNATURE_INFO)
+    signed = output.read_bytes()
+
+    # The original bytes are kept untouched and the update matches its xref kind
+    assert signed.startswith(original)
+    assert result == {"hash": hashlib.sha256(signed).hexdigest(), "size": len(signed), "pages": 2}
+    with open(output, "rb") as f:
+        assert server.IncrementalUpdate.previous_xref(f)[1] == xref_stream
+
+    reader = PyPDF2.PdfReader(io.BytesIO(signed), strict=True)
+    assert len(reader.pages) == 2
+    assert "/AcroForm" not in reader.trailer['/Root']
+    assert server.read_acroform_fields(reader) == []
+    for page in reader.pages:
+        annotations = server.pdf_resolve(page.get('/Annots')) or []
+        assert not [a for a in annotations if server.pdf_resolve(a).get('/Subtype') == '/Widget']
+
+    # Values are painted into the page and the audit page is appended
+    assert "Ana María" in reader.pages[0].extract_text()
+    assert "Ana María Pérez" in reader.pages[1].extract_text()
+
+
+def test_sign_pdf_twice_chains_updates(tmp_path):
+    source = tmp_path / "original.pdf"
+    source.write_bytes(build_form_pdf(False))
+    first, second = tmp_path / "first.pdf", tmp_path / "second.pdf"
+    server.sign_pdf(str(source), str(first), {"nombre": "Uno"}, SIGNATURE_INFO)
+    server.sign_pdf(str(first), str(second), {}, SIGNATURE_INFO)
+
+    assert second.read_bytes().startswith(first.read_bytes())
+    assert len(PyPDF2.PdfReader(str(second), strict=True).pages) == 3
+
+
+def test_process_pool_signs_in_a_fresh_interpreter(tmp_path):
+    source = tmp_path / "original.pdf"
+    source.write_bytes(build_form_pdf(True))
+    output = tmp_path / "signed.pdf"
+    executor = server.BoundedExecutor("pdf-test", server.pdf_process_pool, 1, 1)
+
+    async def run():
+        fields = await executor.run(server.extract_pdf_fields, source)
+        signed = await executor.run(server.sign_pdf, str(source), str(output), {"nombre": "Uno"}, SIGNATURE_INFO)
+        return fields, signed
+
+    try:
+        fields, signed = asyncio.run(run())
+        assert executor.pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        if executor.pool is not None:
+            executor.pool.shutdown()
+    assert [field['name'] for field in fields] == ["nombre", "acepta"]
+    assert signed['hash'] == hashlib.sha256(output.read_bytes()).hexdigest()
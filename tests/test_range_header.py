@@ -0,0 +1,36 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=10-19", (10, 19)),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=-5", (95, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=90-500", (90, 99)),
+    ("Bytes = 99-", (99, 99)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert server.parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=-0"])
+def test_unsatisfiable_ranges_raise_416(header):
+    with pytest.raises(HTTPException) as error:
+        server.parse_range_header(header, 100)
+    assert error.value.status_code == 416
+    assert error.value.headers == {"Content-Range": "bytes */100"}
+
+
+def test_any_range_of_empty_file_is_unsatisfiable():
+    with pytest.raises(HTTPException) as error:
+        server.parse_range_header("bytes=0-", 0)
+    assert error.value.headers == {"Content-Range": "bytes */0"}
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "items=0-1", "bytes=a-b", "bytes=-", "bytes=1-x", "bytes=20-10"])
+def test_ignored_ranges_return_none(header):
+    assert server.parse_range_header(header, 100) is None
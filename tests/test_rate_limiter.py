@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def acquire(limiter, key, capacity=3, per_second=0.5):
+    return asyncio.run(limiter.acquire(key, capacity, per_second))
+
+
+def test_burst_then_wait_until_refill(clock):
+    limiter = server.MemoryRateLimiter(max_keys=10)
+    assert [acquire(limiter, "a") for _ in range(3)] == [0, 0, 0]
+    assert acquire(limiter, "a") == pytest.approx(2.0)
+
+    clock[0] += 1
+    assert acquire(limiter, "a") == pytest.approx(1.0)
+    clock[0] += 1
+    assert acquire(limiter, "a") == 0
+    assert limiter.metrics() == {"backend": "memory", "allowed": 4, "limited": 2}
+
+
+def test_refill_is_capped_at_capacity(clock):
+    limiter = server.MemoryRateLimiter(max_keys=10)
+    acquire(limiter, "a")
+    clock[0] += 3600
+    assert [acquire(limiter, "a") for _ in range(4)][-1] > 0
+
+
+def test_keys_are_independent_and_least_recent_is_evicted(clock):
+    limiter = server.MemoryRateLimiter(max_keys=2)
+    acquire(limiter, "a", capacity=1)
+    acquire(limiter, "b", capacity=1)
+    assert acquire(limiter, "a", capacity=1) > 0
+    acquire(limiter, "c", capacity=1)
+
+    assert list(limiter.buckets) == ["a", "c"]
+    # "b" was evicted and starts again with a full bucket
+    assert acquire(limiter, "b", capacity=1) == 0
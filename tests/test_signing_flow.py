@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+from tests.test_pdf_signing import build_form_pdf
+
+
+def test_replay_completes_a_signing_whose_audit_write_failed(mongo_db_name, monkeypatch, tmp_path):
+    tmp_dir = tmp_path / "tmp"
+    tmp_dir.mkdir()
+    monkeypatch.setattr(server, "storage", server.LocalStorage(tmp_path / "store", tmp_dir))
+    monkeypatch.setattr(server, "BLOBS_TMP_DIR", tmp_dir)
+    monkeypatch.setattr(server, "pdf_executor", server.BoundedExecutor("pdf", ThreadPoolExecutor, 1, 1))
+    server.contract_cache.clear()
+
+    original = build_form_pdf(False)
+    file_hash = hashlib.sha256(original).hexdigest()
+    server.storage.put_bytes(server.blob_key(file_hash), original)
+
+    log_audit = server.log_audit
+    failures = []
+
+    async def failing_log_audit(**kwargs):
+        if kwargs['action'] == "contract_signed" and not failures:
+            failures.append(kwargs)
+            raise RuntimeError("audit write failed")
+        await log_audit(**kwargs)
+
+    monkeypatch.setattr(server, "log_audit", failing_log_audit)
+    request = server.SignContractRequest(
+        request_id="req-1", form_data={"nombre": "Ana"}, ip_address="192.0.2.1", idempotency_key="clave-1"
+    )
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        monkeypatch.setattr(server, "notification_wakeup", asyncio.Event())
+        try:
+            await server.ensure_indexes()
+            await server.db.contracts.insert_one(server.Contract(
+                id="contract-1", name="Contrato", file_path=server.storage.location(server.blob_key(file_hash)),
+                file_hash=file_hash
+            ).model_dump())
+            await server.db.signature_requests.insert_one({
+                **server.SignatureRequest(
+                    id="req-1", contract_id="contract-1", signer_name="Ana", signer_email="ana@example.com"
+                ).model_dump(),
+                "status": "otp_verified"
+            })
+
+            try:
+                await server.sign_contract(request, None)
+            except RuntimeError:
+                pass
+            committed = await server.db.signature_requests.find_one({"id": "req-1"}, {"_id": 0})
+            queued_before = await server.db.notifications.count_documents({})
+
+            first = await server.sign_contract(request, None)
+            second = await server.sign_contract(request, None)
+            await server.audit_writer.flush()
+            return {
+                "committed": committed,
+                "queued_before": queued_before,
+                "responses": [first, second],
+                "final": await server.db.signature_requests.find_one({"id": "req-1"}, {"_id": 0}),
+                "audit": await server.db.audit_logs.count_documents({"request_id": "req-1", "action": "contract_signed"}),
+                "emails": await server.db.notifications.count_documents({"request_id": "req-1"})
+            }
+        finally:
+            client.close()
+
+    result = asyncio.run(run())
+    assert failures
+    assert result["committed"]['status'] == "signed"
+    assert result["committed"]['signing_finalized'] is False
+    assert result["queued_before"] == 0
+    assert all(response['success'] for response in result["responses"])
+    assert result["responses"][0]['signed_hash'] == result["committed"]['signed_file_hash']
+    assert result["final"]['signing_finalized'] is True
+    assert result["audit"] == 1
+    assert result["emails"] == 1
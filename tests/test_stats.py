@@ -0,0 +1,84 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+
+
+def run_with_db(mongo_db_name, monkeypatch, coro_fn):
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        try:
+            await server.ensure_indexes()
+            return await coro_fn()
+        finally:
+            client.close()
+
+    return asyncio.run(run())
+
+
+def request_doc(request_id, contract_id, status="pending"):
+    return {"id": request_id, "contract_id": contract_id, "status": status, "created_at": datetime.now(timezone.utc)}
+
+
+def test_counters_live_in_one_document_per_key(mongo_db_name, monkeypatch):
+    today = server.stats_day(datetime.now(timezone.utc))
+
+    async def run():
+        await server.db.stats.insert_one({"_id": server.STATS_ID, "total_contracts": 2, "total_requests": 0})
+        docs = [request_doc("r1", "c1"), request_doc("r2", "c1"), request_doc("r3", "c2")]
+        await server.record_requests_created(docs)
+        await server.record_status_change(docs[0], "signed")
+        return (
+            await server.db.stats.find_one({"_id": server.STATS_ID}),
+            await server.db.stats_counters.find({}).to_list(None),
+            await server.compute_dashboard_stats()
+        )
+
+    stats, counters, dashboard = run_with_db(mongo_db_name, monkeypatch, run)
+    assert "by_contract" not in stats and "by_day" not in stats
+    assert stats['by_status'] == {"pending": 2, "signed": 1}
+    assert {doc['_id']: (doc.get('total'), doc.get('signed')) for doc in counters} == {
+        "contract:c1": (2, 1), "contract:c2": (1, None), f"day:{today}": (3, 1)
+    }
+    assert dashboard['by_contract'] == [
+        {"contract_id": "c1", "total": 2, "signed": 1}, {"contract_id": "c2", "total": 1, "signed": 0}
+    ]
+    assert dashboard['by_day'] == [{"date": today, "total": 3, "signed": 1}]
+
+
+def test_reconcile_counters_fixes_drift_and_skips_moving_keys(mongo_db_name, monkeypatch):
+    snapshot = {
+        "by_contract": {"c1": {"total": 2, "signed": 1}, "c3": {"total": 1, "signed": 0}},
+        "by_day": {"2024-01-01": {"total": 3, "signed": 1}}
+    }
+    before = {
+        "contract:c1": {"_id": "contract:c1", "kind": "contract", "key": "c1", "total": 5, "signed": 1},
+        "contract:c2": {"_id": "contract:c2", "kind": "contract", "key": "c2", "total": 1, "signed": 0},
+        "day:2024-01-01": {"_id": "day:2024-01-01", "kind": "day", "key": "2024-01-01", "total": 3, "signed": 0},
+    }
+
+    async def run():
+        await server.db.stats_counters.insert_many([dict(doc) for doc in before.values()])
+        # Live traffic touched the day counter while the snapshot was computed
+        current = await server.read_stats_counters()
+        moved = await server.db.stats_counters.find_one_and_update(
+            {"_id": "day:2024-01-01"}, {"$inc": {"total": 1}}, return_document=server.ReturnDocument.AFTER
+        )
+        current["day:2024-01-01"] = moved
+        drift = await server.reconcile_stats_counters(snapshot, before, current)
+        return drift, {doc['_id']: doc for doc in await server.db.stats_counters.find({}).to_list(None)}
+
+    drift, stored = run_with_db(mongo_db_name, monkeypatch, run)
+    assert drift == {
+        "by_contract.c1.total": {"stored": 5, "actual": 2},
+        "by_contract.c2.total": {"stored": 1, "actual": 0},
+        "by_contract.c3.total": {"stored": 0, "actual": 1},
+    }
+    assert (stored["contract:c1"]['total'], stored["contract:c1"]['signed']) == (2, 1)
+    assert "contract:c2" not in stored
+    assert (stored["contract:c3"]['total'], stored["contract:c3"]['kind']) == (1, "contract")
+    assert (stored["day:2024-01-01"]['total'], stored["day:2024-01-01"]['signed']) == (4, 0)
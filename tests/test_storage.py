@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    tmp_dir = tmp_path / "tmp"
+    tmp_dir.mkdir()
+    backend = server.LocalStorage(tmp_path / "store", tmp_dir)
+    monkeypatch.setattr(server, "storage", backend)
+    return backend
+
+
+def test_ensure_blob_imports_intact_legacy_file(local_storage, tmp_path):
+    legacy = tmp_path / "legacy.pdf"
+    legacy.write_bytes(b"%PDF-1.4 contrato")
+    file_hash = hashlib.sha256(legacy.read_bytes()).hexdigest()
+
+    assert asyncio.run(server.ensure_blob(file_hash, str(legacy))) == legacy.stat().st_size
+    assert local_storage.path(server.blob_key(file_hash)).read_bytes() == legacy.read_bytes()
+
+
+def test_ensure_blob_refuses_legacy_file_with_wrong_hash(local_storage, tmp_path):
+    legacy = tmp_path / "legacy.pdf"
+    legacy.write_bytes(b"%PDF-1.4 contrato")
+    file_hash = hashlib.sha256(legacy.read_bytes()).hexdigest()
+    legacy.write_bytes(b"%PDF-1.4 contr")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.ensure_blob(file_hash, str(legacy)))
+    assert error.value.status_code == 409
+    assert local_storage.size(server.blob_key(file_hash)) is None
+
+
+def test_ensure_blob_without_source_is_missing(local_storage, tmp_path):
+    assert asyncio.run(server.ensure_blob("ab" * 32, str(tmp_path / "gone.pdf"))) is None
+
+
+@pytest.fixture
+def s3_storage(tmp_path, monkeypatch):
+    moto = pytest.importorskip("moto")
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "S3_BUCKET": "contratos-test",
+        "S3_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("S3_ENDPOINT_URL", raising=False)
+    monkeypatch.setattr(server, "S3_PREFIX", "tenant/")
+    monkeypatch.setattr(server, "S3_CACHE_DIR", tmp_path / "cache")
+    with moto.mock_aws():
+        backend = server.S3Storage()
+        backend.client.create_bucket(Bucket="contratos-test")
+        yield backend
+
+
+def test_s3_storage_round_trip(s3_storage, tmp_path):
+    source = tmp_path / "contrato.pdf"
+    source.write_bytes(bytes(range(256)) * 40)
+    key = server.blob_key(hashlib.sha256(source.read_bytes()).hexdigest())
+
+    assert s3_storage.size(key) is None
+    s3_storage.put_file(key, source, True)
+    assert not source.exists()
+    assert s3_storage.size(key) == 10240
+    assert s3_storage.location(key) == f"s3://contratos-test/tenant/{key}"
+
+    data = bytes(range(256)) * 40
+    assert b"".join(s3_storage.iter_range(key, 0, 10239, 4096)) == data
+    assert b"".join(s3_storage.iter_range(key, 100, 1099, 300)) == data[100:1100]
+    assert s3_storage.fetch(key).read_bytes() == data
+
+    s3_storage.put_bytes("signatures/meta.json", b"{}")
+    assert sorted(s3_storage.list_keys("", server.time.time() + 60)) == sorted([key, "signatures/meta.json"])
+    assert s3_storage.list_keys("blobs/", server.time.time() - 3600) == []
+
+    url = s3_storage.presigned_url(key, "contrato ñ.pdf", 60)
+    assert url.startswith("https://") and f"tenant/{key}" in url and "Expires=" in url
+    assert "response-content-disposition=" in url
+
+    s3_storage.delete(key)
+    assert s3_storage.size(key) is None
+    assert not (s3_storage.cache_dir / key).exists()
+
+
+def test_s3_aborted_range_closes_the_body(s3_storage, monkeypatch):
+    s3_storage.put_bytes("blobs/aa/bb/object", b"x" * 1000)
+    closed = []
+    get_object = s3_storage.client.get_object
+
+    def tracked_get_object(**kwargs):
+        response = get_object(**kwargs)
+        close = response["Body"].close
+        response["Body"].close = lambda: (closed.append(True), close())
+        return response
+
+    monkeypatch.setattr(s3_storage.client, "get_object", tracked_get_object)
+    chunks = s3_storage.iter_range("blobs/aa/bb/object", 0, 999, 100)
+    next(chunks)
+    chunks.close()
+    assert closed == [True]
+
+
+def test_s3_fetch_cache_evicts_least_recently_used(s3_storage):
+    s3_storage.cache_max_bytes = 250
+    for name in ("a", "b", "c"):
+        s3_storage.put_bytes(f"blobs/{name}", name.encode() * 100)
+
+    first = s3_storage.fetch("blobs/a")
+    past = server.time.time() - 100
+    os.utime(first, (past, past))
+    s3_storage.fetch("blobs/b")
+    s3_storage.fetch("blobs/c")
+
+    assert not first.exists()
+    assert (s3_storage.cache_dir / "blobs/b").exists()
+    assert (s3_storage.cache_dir / "blobs/c").exists()
+
+
+def test_migrate_storage_copies_legacy_files_to_s3(s3_storage, mongo_db_name, tmp_path, monkeypatch):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    intact = tmp_path / "intact.pdf"
+    intact.write_bytes(b"%PDF-1.4 intacto")
+    intact_hash = hashlib.sha256(intact.read_bytes()).hexdigest()
+    damaged = tmp_path / "damaged.pdf"
+    damaged.write_bytes(b"%PDF-1.4 truncado")
+    monkeypatch.setattr(server, "storage", s3_storage)
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+        monkeypatch.setattr(server, "db", client[mongo_db_name])
+        try:
+            await server.db.contracts.insert_many([
+                {"id": "intact", "file_hash": intact_hash, "file_path": str(intact)},
+                {"id": "damaged", "file_hash": "cd" * 32, "file_path": str(damaged)},
+            ])
+            first = await server.migrate_storage()
+            second = await server.migrate_storage()
+            doc = await server.db.contracts.find_one({"id": "intact"})
+            return first, second, doc
+        finally:
+            client.close()
+
+    first, second, doc = asyncio.run(run())
+    assert first["copied"] == 1 and first["updated"] == 1
+    assert first["corrupt"] == [str(damaged)]
+    assert second["skipped"] == 1 and second["copied"] == 0
+    assert doc["file_path"] == s3_storage.location(server.blob_key(intact_hash))
+    assert s3_storage.size(server.blob_key(intact_hash)) == intact.stat().st_size